@@ -0,0 +1,114 @@
+""" Round trip benchmark for the tgl commands.
+
+Runs every subcommand against the fake Toggl API in `tests/fake_toggl.py` and reports the
+number of requests and connections it made, the bytes it transferred and its wall time.
+Each command runs in its own process with a temporary data directory, so the real account
+data is never touched.
+
+Usage (from the repository root):
+    python -m benchmarks.roundtrips [--latency SECONDS] [--workspaces N] [--projects N] [--json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from tests.fake_toggl import API_TOKEN, FakeTogglServer, TogglState, unthrottle
+
+# (name, arguments, input typed by the user), run in this order since later commands
+# depend on the state left by the earlier ones. {data_dir} in an argument is replaced
+# with the temporary data directory.
+SCENARIOS: List[Tuple[str, List[str], Optional[str]]] = [
+    ('setup', ['setup', '-a'], API_TOKEN + '\n'),
+    ('reconfig', ['reconfig'], None),
+    ('start', ['start', 'benchmark timer'], None),
+    ('current', ['current'], None),
+    ('current --refresh', ['current', '--refresh'], None),
+    ('pause', ['pause'], None),
+    ('resume', ['resume'], None),
+    ('stop', ['stop'], None),
+    ('start --confirm', ['start', 'benchmark timer', '--confirm'], None),
+    ('stop --refresh', ['stop', '--refresh'], None),
+    ('report', ['report'], None),
+    ('export', ['export'], None),
+    ('export --output', ['export', '--output', '{data_dir}/export.csv'], None),
+    ('import', ['import', '{data_dir}/export.csv'], None),
+    ('sync', ['sync'], None),
+    ('sync (incremental)', ['sync'], None),
+    ('create project', ['create', 'project', 'benchmark project'], '1\n'),
+    ('delete project', ['delete', 'project'], '1\n'),
+]
+
+
+def run_scenario(server: FakeTogglServer, env: Dict[str, str], args: List[str], user_input: Optional[str]) -> dict:
+    server.reset_stats()
+
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-m', 'tgl.main'] + args,
+        input=(user_input or '').encode('utf-8'),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=env
+    )
+    wall_time = time.perf_counter() - start
+
+    stats = server.stats
+    return {
+        'requests': len(stats['requests']),
+        'connections': stats['connections'],
+        'bytes_sent': stats['bytes_received'],
+        'bytes_received': stats['bytes_sent'],
+        'wall_ms': wall_time * 1000,
+        'exit_code': output.returncode,
+        'calls': [f"{r['method']} {r['path']} {r['status']}" for r in stats['requests']],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the round trips of every tgl command.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--workspaces', type=int, default=3)
+    parser.add_argument('--projects', type=int, default=20, help='Projects in every workspace.')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+    args = parser.parse_args()
+
+    server = FakeTogglServer(latency=args.latency, state=TogglState(args.workspaces, args.projects)).start()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ)
+        env.update({
+            'TGL_API_URL': server.url,
+            'TGL_DATA_DIR': data_dir,
+            # Keep the commands away from a tgl daemon the user may be running
+            'XDG_RUNTIME_DIR': data_dir,
+        })
+
+        for name, command_args, user_input in SCENARIOS:
+            command_args = [arg.format(data_dir=data_dir) for arg in command_args]
+            results[name] = run_scenario(server, env, command_args, user_input)
+
+            if name == 'setup':
+                # Waiting for the rate limit would only add to the wall times
+                unthrottle(data_dir)
+
+    server.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+
+    print(f"{'command':<20} {'requests':>8} {'conns':>6} {'sent':>8} {'received':>9} {'wall':>10}")
+    for name, result in results.items():
+        print(f"{name:<20} {result['requests']:>8} {result['connections']:>6} {result['bytes_sent']:>7}B "
+              f"{result['bytes_received']:>8}B {result['wall_ms']:>8.1f}ms"
+              + ('' if result['exit_code'] == 0 else f"  (exit code {result['exit_code']})"))
+
+
+if __name__ == '__main__':
+    main()
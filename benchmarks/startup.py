@@ -0,0 +1,128 @@
+""" Startup benchmark for tgl.
+
+Measures the import cost of `tgl.main` and the wall time of `tgl --help`, of a usage error and
+of the help message of every subcommand in `main.create_parser`. None of these should touch
+the network, so they are also checked for importing the HTTP stack.
+
+The results are compared against `startup_budget.json` and the script exits with status 1
+when a budget is exceeded, so it can be tracked across releases.
+
+Usage (from the repository root):
+    python -m benchmarks.startup [--runs N] [--json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'startup_budget.json')
+
+with open(BUDGET_FILE, 'r') as f:
+    BUDGET = json.load(f)
+
+
+def get_subcommands() -> List[str]:
+    from tgl.main import create_parser
+
+    parser = create_parser()
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            return list(action.choices)
+
+    return []
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """ Return the cumulative import time in microseconds of every module in `-X importtime` output. """
+    modules: Dict[str, int] = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+
+    return modules
+
+
+def run_python(args: List[str]) -> Tuple[float, Dict[str, int]]:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE
+    )
+    wall_time = time.perf_counter() - start
+
+    return wall_time, parse_importtime(output.stderr.decode('utf-8'))
+
+
+def measure_import(runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        _, modules = run_python(['-c', 'import tgl.main'])
+        times.append(modules['tgl.main'] / 1000)
+
+    return statistics.median(times)
+
+
+def measure_command(command: List[str], runs: int) -> Tuple[float, List[str]]:
+    times = []
+    heavy_modules: List[str] = []
+    for _ in range(runs):
+        wall_time, modules = run_python(['-m', 'tgl.main'] + command)
+        times.append(wall_time * 1000)
+        heavy_modules = [name for name in BUDGET['forbidden_modules'] if name in modules]
+
+    return statistics.median(times), heavy_modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the startup time of tgl.')
+    parser.add_argument('--runs', type=int, default=5, help='Number of runs per measurement.')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+    args = parser.parse_args()
+
+    # `tgl start` without a description is an argparse usage error
+    commands = [['--help'], ['start']] + [[name, '--help'] for name in get_subcommands()]
+
+    results = {'import_ms': measure_import(args.runs), 'commands': {}}
+    for command in commands:
+        wall_ms, heavy_modules = measure_command(command, args.runs)
+        results['commands'][' '.join(['tgl'] + command)] = {
+            'wall_ms': wall_ms,
+            'forbidden_modules': heavy_modules
+        }
+
+    failures = []
+    if results['import_ms'] > BUDGET['import_ms']:
+        failures.append(f"import tgl.main took {results['import_ms']:.1f}ms (budget {BUDGET['import_ms']}ms)")
+
+    for command, result in results['commands'].items():
+        if result['wall_ms'] > BUDGET['command_ms']:
+            failures.append(f"{command} took {result['wall_ms']:.1f}ms (budget {BUDGET['command_ms']}ms)")
+        if result['forbidden_modules']:
+            failures.append(f"{command} imported {', '.join(result['forbidden_modules'])}")
+
+    if args.json:
+        results['failures'] = failures
+        print(json.dumps(results, indent=4))
+    else:
+        print(f"import tgl.main: {results['import_ms']:.1f}ms")
+        for command, result in results['commands'].items():
+            print(f"{command:<24} {result['wall_ms']:.1f}ms")
+
+        for failure in failures:
+            print(f"OVER BUDGET: {failure}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from tests.utils import FakeTogglTestCase
+from tgl.catalog import ProjectCatalog, to_bytes
+
+
+class TestConfigFiles(FakeTogglTestCase):
+    def _read(self, file_name: str) -> dict:
+        with open(os.path.join(self.data_dir, file_name)) as f:
+            return json.load(f)
+
+    def _read_projects(self) -> dict:
+        catalog = ProjectCatalog(os.path.join(self.data_dir, 'projects.bin'))
+        return {wid: dict(projects) for wid, projects in catalog.items()}
+
+    def test_sections_in_their_files(self) -> None:
+        """ Test that setup keeps the credentials and the account catalogue in separate files. """
+        self.assertEqual(set(self._read('credentials.json')), {'DEFAULTS'})
+        self.assertEqual(set(self._read('catalog.json')), {'WORKSPACES', 'SYNC'})
+        self.assertEqual(len(self._read_projects()), 2)
+        self.assertNotIn('DEFAULTS', self._read('config.json'))
+
+    def test_timer_commands_leave_the_catalog_alone(self) -> None:
+        """ Test that start, pause, resume and stop don't read or write the catalogue. """
+        catalog_paths = [os.path.join(self.data_dir, file_name) for file_name in ('catalog.json', 'projects.bin')]
+        mtimes = [os.stat(path).st_mtime_ns for path in catalog_paths]
+
+        for command in (['start', 'description'], ['pause'], ['resume'], ['current'], ['stop']):
+            output = self._run_command(['--trace'] + command)
+
+            self.assertIn('load credentials.json', output)
+            self.assertNotIn('catalog.json', output)
+            self.assertNotIn('projects.bin', output)
+
+        self.assertEqual([os.stat(path).st_mtime_ns for path in catalog_paths], mtimes)
+        self.assertEqual(set(self._read('state.json')), {'PREVIOUS_TIMER', 'CURRENT_TIMER'})
+
+    def test_old_config_file(self) -> None:
+        """ Test that a config file with every section is split the first time it is used. """
+        config = self._read('config.json')
+        for file_name in ('credentials.json', 'catalog.json'):
+            config.update(self._read(file_name))
+            os.unlink(os.path.join(self.data_dir, file_name))
+
+        config['PROJECTS'] = self._read_projects()
+        config['PROJECT_INDEX'] = {}
+        os.unlink(os.path.join(self.data_dir, 'projects.bin'))
+
+        with open(os.path.join(self.data_dir, 'config.json'), 'w') as f:
+            json.dump(config, f)
+
+        output = self._run_command(['start', 'description', '-n', 'Project 2'])
+
+        self.assertIn('Timer started.', output)
+        self.assertEqual(self._read('credentials.json')['DEFAULTS'], config['DEFAULTS'])
+        self.assertEqual(self._read_projects(), config['PROJECTS'])
+        self.assertEqual(set(self._read('catalog.json')), {'WORKSPACES', 'SYNC'})
+        self.assertEqual(set(self._read('config.json')), {'SETTINGS', 'URI'})
+
+
+class TestProjectCatalog(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.data_dir, 'projects.bin')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.data_dir)
+
+    def _write(self, projects: dict) -> None:
+        with open(self.path, 'wb') as f:
+            f.write(to_bytes(projects))
+
+    def test_round_trip(self) -> None:
+        """ Test that the projects read back are the ones written, in name order. """
+        self._write({'20': {'7': 'beta', '5': 'Alpha', '6': 'Ünïcode'}, '3': {'9': 'Other'}})
+
+        catalog = ProjectCatalog(self.path)
+
+        self.assertEqual(list(catalog), ['3', '20'])
+        self.assertEqual(list(catalog['20'].items()), [('5', 'Alpha'), ('7', 'beta'), ('6', 'Ünïcode')])
+        self.assertEqual(catalog['3'], {'9': 'Other'})
+
+    def test_names_stored_once(self) -> None:
+        """ Test that a name used by projects in many workspaces is only stored once. """
+        self._write({str(wid): {str(wid * 10): 'Shared name'} for wid in range(1, 6)})
+
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read().count(b'Shared name'), 1)
+
+    def test_changes(self) -> None:
+        """ Test that workspaces can be added, changed and deleted before the catalog is written again. """
+        self._write({'1': {'10': 'One'}, '2': {'20': 'Two'}})
+
+        catalog = ProjectCatalog(self.path)
+        catalog['1']['11'] = 'Eleven'
+        del catalog['2']
+        catalog['3'] = {'30': 'Three'}
+
+        self.assertNotIn('2', catalog)
+        self.assertEqual(len(catalog), 2)
+
+        self._write(catalog)
+
+        self.assertEqual(dict(ProjectCatalog(self.path)), {'1': {'11': 'Eleven', '10': 'One'}, '3': {'30': 'Three'}})
+
+    def test_close(self) -> None:
+        """ Test that a closed catalog keeps its projects in memory and the file can be replaced. """
+        self._write({'1': {'10': 'One'}, '2': {'20': 'Two'}})
+
+        catalog = ProjectCatalog(self.path)
+        del catalog['2']
+        catalog.close()
+
+        os.unlink(self.path)
+
+        self.assertEqual(dict(catalog), {'1': {'10': 'One'}})
+        self.assertEqual(catalog.find_prefix('1', 'on'), [('10', 'One')])
+
+        self._write(catalog)
+        self.assertEqual(dict(ProjectCatalog(self.path)), {'1': {'10': 'One'}})
+
+    def test_find_prefix(self) -> None:
+        """ Test that projects are found by the start of their name without decoding the workspace. """
+        self._write({'1': {str(pid): f'Project {pid:03}' for pid in range(100)}, '2': {'7': 'project 050'}})
+
+        catalog = ProjectCatalog(self.path)
+
+        self.assertEqual(catalog.find_prefix('1', 'project 05'), [(str(pid), f'Project {pid:03}') for pid in range(50, 60)])
+        self.assertEqual(catalog.find_prefix('2', 'project 050'), [('7', 'project 050')])
+        self.assertEqual(catalog.find_prefix('1', 'other'), [])
+        self.assertEqual(catalog.find_prefix('3', 'project'), [])
+        self.assertEqual(catalog._decoded, {})
+
+        # Changes that aren't written yet are searched too
+        catalog['1']['200'] = 'Project 05x'
+        self.assertEqual(catalog.find_prefix('1', 'project 05x'), [('200', 'Project 05x')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import shutil
+import signal
+import socket
+import tempfile
+import unittest
+import subprocess
+
+from tgl.utils import delete_user_data
+from tests.utils import run_command, FakeTogglTestCase
+
+
+class TestDaemonCommand(unittest.TestCase):
+    def setUp(self) -> None:
+        delete_user_data()
+        self.daemon = subprocess.Popen(['tgl', 'daemon'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        # Wait for the daemon to start listening
+        self.daemon.stdout.readline()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        subprocess.run(['tgl', 'daemon', '--stop'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.daemon.wait(timeout=5)
+        self.daemon.stdout.close()
+        self.daemon.stderr.close()
+        return super().tearDown()
+
+    def test_daemon_status(self) -> None:
+        """ Test the output of the daemon status command while the daemon is running. """
+        output = run_command('tgl daemon --status')
+        self.assertRegex(output, r'tgl daemon is running \(pid \d*\).')
+
+    def test_daemon_already_running(self) -> None:
+        """ Test that a second daemon doesn't start while one is running. """
+        output = run_command('tgl daemon')
+        self.assertIn('The tgl daemon is already running.', output)
+
+    def test_forwarded_command_output(self) -> None:
+        """ Test that a command run through the daemon gives the same output as running it directly. """
+        output = run_command('tgl current')
+        self.assertIn("Please run 'tgl setup' before you can run a timer.", output)
+
+    def test_daemon_stop(self) -> None:
+        """ Test the output of the daemon stop command and that commands still work without the daemon. """
+        output = run_command('tgl daemon --stop')
+        self.assertIn('tgl daemon stopped.', output)
+
+        time.sleep(0.5)
+
+        output = run_command('tgl daemon --status')
+        self.assertIn('The tgl daemon is not running.', output)
+
+        output = run_command('tgl current')
+        self.assertIn("Please run 'tgl setup' before you can run a timer.", output)
+
+
+class TestDaemonSavesState(FakeTogglTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.daemon = subprocess.Popen(['tgl', 'daemon'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self.env)
+
+        # Wait for the daemon to start listening
+        self.daemon.stdout.readline()
+
+    def tearDown(self) -> None:
+        if self.daemon.poll() is None:
+            self.daemon.kill()
+
+        self.daemon.wait(timeout=5)
+        self.daemon.stdout.close()
+        self.daemon.stderr.close()
+        return super().tearDown()
+
+    def test_state_saved_after_each_command(self) -> None:
+        """ Test that a command run by the daemon is saved before the daemon stops. """
+        self._run_command(['start', 'description'])
+        output = self._run_command(['pause'])
+        self.assertIn('Timer "description" paused.', output)
+
+        # Killed without a chance to write anything when it stops
+        self.daemon.kill()
+        self.daemon.wait(timeout=5)
+
+        with open(os.path.join(self.data_dir, 'state.json')) as f:
+            self.assertEqual(json.load(f)['PREVIOUS_TIMER']['description'], 'description')
+
+        output = self._run_command(['resume'])
+        self.assertIn('Timer "description" resumed.', output)
+
+    def test_state_saved_on_signal(self) -> None:
+        """ Test that the daemon stops cleanly on SIGINT and SIGHUP too. """
+        for signal_number in (signal.SIGINT, signal.SIGHUP):
+            self._run_command(['start', 'description'])
+            self.daemon.send_signal(signal_number)
+            self.assertEqual(self.daemon.wait(timeout=5), 0)
+            self.assertFalse(os.path.exists(os.path.join(self.data_dir, f'tgl-{os.getuid()}', 'daemon.sock')))
+
+            self.daemon.stdout.close()
+            self.daemon.stderr.close()
+            self.daemon = subprocess.Popen(['tgl', 'daemon'], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                           env=self.env)
+            self.daemon.stdout.readline()
+
+
+class TestDaemonSocket(unittest.TestCase):
+    def setUp(self) -> None:
+        self.runtime_dir = tempfile.mkdtemp()
+        self.env = dict(os.environ, XDG_RUNTIME_DIR=self.runtime_dir)
+
+        # A socket directory anyone can use, as if another user had made it
+        self.socket_dir = os.path.join(self.runtime_dir, f'tgl-{os.getuid()}')
+        os.mkdir(self.socket_dir)
+        os.chmod(self.socket_dir, 0o777)
+
+        self.impostor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.impostor.bind(os.path.join(self.socket_dir, 'daemon.sock'))
+        self.impostor.listen(1)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.impostor.close()
+        shutil.rmtree(self.runtime_dir)
+        return super().tearDown()
+
+    def _run(self, command: str) -> str:
+        result = subprocess.run(command.split(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                env=self.env, timeout=10)
+        return result.stdout.decode('utf-8')
+
+    def test_socket_in_shared_directory_is_not_used(self) -> None:
+        """ Test that commands don't talk to a socket in a directory other users can use. """
+        output = self._run('tgl daemon --status')
+        self.assertIn('The tgl daemon is not running.', output)
+
+    def test_daemon_does_not_start_in_shared_directory(self) -> None:
+        """ Test that the daemon refuses to listen in a directory other users can use. """
+        output = self._run('tgl daemon')
+        self.assertIn(f'ERROR: {self.socket_dir} has to be a directory that only you can use', output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import csv
+import json
+import unittest
+import subprocess
+
+from tests.utils import FakeTogglTestCase
+
+
+class TestExportCommand(FakeTogglTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        state = self.server.state
+        with state.lock:
+            workspace_id = state.default_wid
+            self.project = next(p for p in state.projects.values() if p['wid'] == workspace_id)
+
+            # More entries than fit in a page of the report
+            for i in range(75):
+                state.add_time_entry(workspace_id, f'entry {i}', f'2021-03-01T09:{i % 60:02}:00+00:00', 60,
+                                     project_id=self.project['id'], tags=['billing', 'client'])
+
+    def test_export_csv(self) -> None:
+        """ Test that every page of time entries is exported as CSV to the standard output. """
+        output = self._run_command(['export', '--since', '2021-03-01', '--until', '2021-03-31'])
+
+        rows = list(csv.DictReader(output.splitlines()))
+
+        self.assertEqual(len(rows), 75)
+        self.assertEqual(rows[0]['project'], self.project['name'])
+        self.assertEqual(rows[0]['duration'], '60')
+        self.assertEqual(rows[0]['tags'], 'billing,client')
+        self.assertEqual(len(self._requests()), 3)
+
+    def test_export_jsonl_to_file(self) -> None:
+        """ Test that --format jsonl --output writes one JSON object per time entry to the file. """
+        path = os.path.join(self.data_dir, 'entries.jsonl')
+
+        output = self._run_command(['export', '-s', '2021-03-01', '-u', '2021-03-31', '-f', 'jsonl', '-o', path])
+
+        self.assertIn(f'Exported 75 time entries to {path}', output)
+
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+
+        self.assertEqual(len(rows), 75)
+        self.assertEqual(rows[0]['project_id'], self.project['id'])
+        self.assertEqual(rows[0]['tags'], ['billing', 'client'])
+
+    def test_export_workspace_to_stdout(self) -> None:
+        """ Test that the workspace picker of --workspace stays out of the export written to the standard output. """
+        result = subprocess.run(
+            ['tgl', 'export', '-s', '2021-03-01', '-u', '2021-03-31', '--workspace'],
+            input=b'1\n', stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self.env
+        )
+
+        self.assertIn('1: Workspace 1', result.stderr.decode('utf-8'))
+        self.assertIn('Please enter the number of the workspace', result.stderr.decode('utf-8'))
+
+        rows = list(csv.DictReader(result.stdout.decode('utf-8').splitlines()))
+        self.assertEqual(len(rows), 75)
+        self.assertEqual(rows[0]['project'], self.project['name'])
+
+    def test_export_nothing(self) -> None:
+        """ Test that a range without time entries only exports the CSV header. """
+        output = self._run_command(['export', '--since', '2020-01-01', '--until', '2020-01-31'])
+
+        self.assertEqual(output.strip(), 'id,workspace_id,project_id,project,description,start,stop,duration,billable,tags')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,519 @@
+""" In-memory stand-in for the Toggl v8 API and the detailed report of the Reports v2 API.
+
+Covers every endpoint under `URI` in `tgl/data/config.json` so tgl can run without a Toggl
+account. Point tgl at it with the `TGL_API_URL` environment variable and keep the account
+data away from the real config with `TGL_DATA_DIR`.
+
+The server can add latency to every response and fail requests on purpose, and it counts
+the requests, connections and bytes it handled so round trips can be measured.
+
+Run it on its own with:
+    python -m tests.fake_toggl [--port PORT] [--latency SECONDS] [--fail-rate RATE]
+"""
+import os
+import re
+import json
+import time
+import base64
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+from socketserver import ThreadingMixIn
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, List, Optional, Tuple
+
+API_TOKEN = 'fake-api-token'
+EMAIL = 'tgl@example.com'
+PASSWORD = 'password'
+
+API_PREFIX = '/api/v8'
+REPORTS_PREFIX = '/reports/api/v2'
+
+# The Reports API always returns pages of 50 time entries
+REPORT_PAGE_SIZE = 50
+
+# /me only returns the time entries of the last 9 days, and /time_entries at most 1000
+ME_TIME_ENTRY_DAYS = 9
+TIME_ENTRIES_LIMIT = 1000
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def unthrottle(data_dir: str) -> None:
+    """ Turn off the rate limit of the tgl set up in `data_dir`, since the fake API has none. """
+    config_path = os.path.join(data_dir, 'config.json')
+
+    # Setup only writes config.json when it moves the sections of an older config file
+    config = {'SETTINGS': {}}
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            config = json.load(f)
+
+    config.setdefault('SETTINGS', {}).update({'REQUESTS_PER_SECOND': 1000, 'REQUEST_BURST': 1000})
+
+    with open(config_path, 'w') as f:
+        json.dump(config, f, indent=4)
+
+
+def to_unix(timestamp: str) -> int:
+    return int(datetime.strptime(timestamp.replace(':', ''), '%Y-%m-%dT%H%M%S%z').timestamp())
+
+
+class TogglState:
+    """ Account data served by the fake API. """
+
+    def __init__(self, workspace_count: int = 1, projects_per_workspace: int = 0) -> None:
+        self.lock = threading.Lock()
+        self.next_id = 1000
+
+        self.workspaces: Dict[int, dict] = {}
+        self.projects: Dict[int, dict] = {}
+        self.deleted_projects: Dict[int, dict] = {}
+        self.time_entries: Dict[int, dict] = {}
+
+        # Seconds the server's clock is ahead of the real time, for the times it starts and
+        # stops timers at and the Date header
+        self.clock_offset = 0
+
+        for w in range(workspace_count):
+            workspace_id = self._new_id()
+            self.workspaces[workspace_id] = {'id': workspace_id, 'name': f'Workspace {w + 1}', 'at': now()}
+
+            for p in range(projects_per_workspace):
+                self.add_project(workspace_id, f'Project {p + 1}')
+
+        self.default_wid = next(iter(self.workspaces))
+
+    def _new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def add_project(self, workspace_id: int, name: str) -> dict:
+        project_id = self._new_id()
+        project = {'id': project_id, 'wid': workspace_id, 'name': name, 'active': True, 'at': now()}
+        self.projects[project_id] = project
+        return project
+
+    def add_time_entry(self, workspace_id: int, description: str, start: str, duration: int,
+                       project_id: Optional[int] = None, tags: Optional[List[str]] = None) -> dict:
+        """ Add a stopped time entry, `duration` seconds long. """
+        entry = {
+            'id': self._new_id(),
+            'wid': workspace_id,
+            'description': description,
+            'start': start,
+            'stop': datetime.fromtimestamp(to_unix(start) + duration, timezone.utc).isoformat(),
+            'duration': duration,
+            'billable': False,
+            'tags': tags or [],
+            'at': now(),
+        }
+        if project_id is not None:
+            entry['pid'] = project_id
+
+        self.time_entries[entry['id']] = entry
+        return entry
+
+    def current_entry(self) -> Optional[dict]:
+        for entry in self.time_entries.values():
+            if entry['duration'] < 0:
+                return entry
+
+        return None
+
+    def stop_entry(self, entry: dict) -> None:
+        if entry['duration'] >= 0:
+            return
+
+        stop = datetime.fromtimestamp(int(time.time()) + self.clock_offset, timezone.utc)
+        entry['stop'] = stop.isoformat()
+        entry['duration'] = int(stop.timestamp()) + entry['duration']
+        entry['at'] = now()
+
+
+class FakeTogglHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that clients can keep the connection open between requests
+    protocol_version = 'HTTP/1.1'
+
+    server: 'FakeTogglServer'
+
+    routes: List[Tuple[str, 're.Pattern', str]] = [
+        ('GET', re.compile(API_PREFIX + r'/me'), 'get_me'),
+        ('POST', re.compile(API_PREFIX + r'/time_entries/start'), 'start_time_entry'),
+        ('GET', re.compile(API_PREFIX + r'/time_entries/current'), 'get_current_time_entry'),
+        ('GET', re.compile(API_PREFIX + r'/time_entries'), 'get_time_entries'),
+        ('PUT', re.compile(API_PREFIX + r'/time_entries/(\d+)/stop'), 'stop_time_entry'),
+        ('POST', re.compile(API_PREFIX + r'/time_entries'), 'create_time_entry'),
+        ('PUT', re.compile(API_PREFIX + r'/time_entries/(\d+)'), 'update_time_entry'),
+        ('POST', re.compile(API_PREFIX + r'/projects'), 'create_project'),
+        ('DELETE', re.compile(API_PREFIX + r'/projects/(\d+)'), 'delete_project'),
+        ('GET', re.compile(API_PREFIX + r'/workspaces/(\d+)/projects'), 'get_workspace_projects'),
+        ('GET', re.compile(REPORTS_PREFIX + r'/details'), 'get_details_report'),
+    ]
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.record_connection()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def date_time_string(self, timestamp: Optional[float] = None) -> str:
+        if timestamp is None:
+            timestamp = time.time() + self.server.state.clock_offset
+
+        return super().date_time_string(timestamp)
+
+    def do_GET(self) -> None:
+        self.dispatch('GET')
+
+    def do_POST(self) -> None:
+        self.dispatch('POST')
+
+    def do_PUT(self) -> None:
+        self.dispatch('PUT')
+
+    def do_DELETE(self) -> None:
+        self.dispatch('DELETE')
+
+    def dispatch(self, method: str) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+        request_bytes = len(self.requestline) + len(str(self.headers)) + len(body)
+
+        path, _, query = self.path.partition('?')
+        self.query = dict(part.split('=', 1) for part in query.split('&') if '=' in part)
+        self.body = json.loads(body.decode('utf-8')) if body else None
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        status, payload = self.route(method, path)
+
+        # Errors are plain text in the Toggl API
+        content_type = 'application/json'
+        if payload is None and status >= 400:
+            response = b''
+        elif isinstance(payload, str):
+            content_type = 'text/plain'
+            response = (payload + '\n').encode('utf-8')
+        else:
+            response = json.dumps(payload).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(response)))
+        if status == 429 and self.server.retry_after is not None:
+            self.send_header('Retry-After', str(self.server.retry_after))
+        self.end_headers()
+        self.wfile.write(response)
+
+        self.server.record_request(method, path, status, request_bytes, len(response))
+
+    def route(self, method: str, path: str) -> Tuple[int, object]:
+        failure = self.server.next_failure()
+        if failure is not None:
+            return failure, None
+
+        for route_method, pattern, handler_name in self.routes:
+            match = pattern.fullmatch(path)
+            if route_method == method and match:
+                if not self.is_authorized():
+                    return 403, None
+
+                with self.server.state.lock:
+                    return getattr(self, handler_name)(*match.groups())
+
+        return 404, None
+
+    def is_authorized(self) -> bool:
+        header = self.headers.get('Authorization', '')
+        if not header.startswith('Basic '):
+            return False
+
+        credentials = base64.b64decode(header[len('Basic '):]).decode('utf-8')
+        return credentials in (f'{API_TOKEN}:api_token', f'{EMAIL}:{PASSWORD}')
+
+    # Endpoints
+
+    def get_me(self) -> Tuple[int, object]:
+        state = self.server.state
+        data = {
+            'api_token': API_TOKEN,
+            'default_wid': state.default_wid,
+            'email': EMAIL,
+            'workspaces': list(state.workspaces.values()),
+        }
+
+        if self.query.get('with_related_data') == 'true':
+            # Everything changed after the given unix time, including deleted objects
+            since = int(self.query.get('since', 0))
+
+            def changed(objects: List[dict]) -> List[dict]:
+                return [o for o in objects if to_unix(o.get('at', now())) > since]
+
+            data['workspaces'] = changed(data['workspaces'])
+            data['projects'] = changed(list(state.projects.values()) + list(state.deleted_projects.values()))
+            recent = time.time() - ME_TIME_ENTRY_DAYS * 24 * 3600
+            data['time_entries'] = [
+                e for e in changed(list(state.time_entries.values())) if to_unix(e['start']) >= recent
+            ]
+
+        # Kept so tests can make changes in the same second as the response
+        self.server.last_since = int(time.time())
+        return 200, {'since': self.server.last_since, 'data': data}
+
+    def get_time_entries(self) -> Tuple[int, object]:
+        from urllib.parse import unquote
+
+        if 'start_date' not in self.query or 'end_date' not in self.query:
+            return 400, 'start_date and end_date are required'
+
+        start = to_unix(unquote(self.query['start_date']))
+        end = to_unix(unquote(self.query['end_date']))
+
+        entries = sorted(
+            (e for e in self.server.state.time_entries.values() if start <= to_unix(e['start']) < end),
+            key=lambda e: e['start']
+        )
+
+        return 200, entries[:TIME_ENTRIES_LIMIT]
+
+    def start_time_entry(self) -> Tuple[int, object]:
+        state = self.server.state
+        time_entry = (self.body or {}).get('time_entry', {})
+
+        current = state.current_entry()
+        if current is not None:
+            state.stop_entry(current)
+
+        start = datetime.fromtimestamp(int(time.time()) + state.clock_offset, timezone.utc)
+        entry = {
+            'id': state._new_id(),
+            'wid': int(time_entry.get('wid') or state.default_wid),
+            'description': time_entry.get('description', ''),
+            'start': start.isoformat(),
+            'duration': -int(start.timestamp()),
+            'billable': bool(time_entry.get('billable')),
+            'tags': time_entry.get('tags') or [],
+            'at': now(),
+        }
+        if time_entry.get('pid'):
+            entry['pid'] = int(time_entry['pid'])
+
+        state.time_entries[entry['id']] = entry
+        return 200, {'data': entry}
+
+    def get_current_time_entry(self) -> Tuple[int, object]:
+        return 200, {'data': self.server.state.current_entry()}
+
+    def stop_time_entry(self, entry_id: str) -> Tuple[int, object]:
+        entry = self.server.state.time_entries.get(int(entry_id))
+        if entry is None:
+            return 404, None
+
+        self.server.state.stop_entry(entry)
+        return 200, {'data': entry}
+
+    def create_time_entry(self) -> Tuple[int, object]:
+        state = self.server.state
+        time_entry = (self.body or {}).get('time_entry', {})
+
+        if 'start' not in time_entry or 'duration' not in time_entry:
+            return 400, 'Start and duration are required'
+
+        entry = {
+            'id': state._new_id(),
+            'wid': int(time_entry.get('wid') or state.default_wid),
+            'description': time_entry.get('description', ''),
+            'start': time_entry['start'],
+            'duration': int(time_entry['duration']),
+            'billable': bool(time_entry.get('billable')),
+            'tags': time_entry.get('tags') or [],
+            'at': now(),
+        }
+        if time_entry.get('stop'):
+            entry['stop'] = time_entry['stop']
+        if time_entry.get('pid'):
+            entry['pid'] = int(time_entry['pid'])
+
+        state.time_entries[entry['id']] = entry
+        return 200, {'data': entry}
+
+    def update_time_entry(self, entry_id: str) -> Tuple[int, object]:
+        entry = self.server.state.time_entries.get(int(entry_id))
+        if entry is None:
+            return 404, None
+
+        entry.update((self.body or {}).get('time_entry', {}))
+        entry['at'] = now()
+        return 200, {'data': entry}
+
+    def create_project(self) -> Tuple[int, object]:
+        state = self.server.state
+        project = (self.body or {}).get('project', {})
+        workspace_id = int(project.get('wid') or state.default_wid)
+
+        for existing in state.projects.values():
+            if existing['wid'] == workspace_id and existing['name'] == project.get('name'):
+                return 400, 'Name has already been taken'
+
+        return 200, {'data': state.add_project(workspace_id, project.get('name', ''))}
+
+    def delete_project(self, project_id: str) -> Tuple[int, object]:
+        state = self.server.state
+
+        project = state.projects.pop(int(project_id), None)
+        if project is None:
+            return 404, None
+
+        project['server_deleted_at'] = project['at'] = now()
+        state.deleted_projects[project['id']] = project
+
+        return 200, [int(project_id)]
+
+    def get_workspace_projects(self, workspace_id: str) -> Tuple[int, object]:
+        projects = [p for p in self.server.state.projects.values() if p['wid'] == int(workspace_id)]
+
+        # Toggl returns null instead of an empty list
+        return 200, projects or None
+
+    def get_details_report(self) -> Tuple[int, object]:
+        state = self.server.state
+
+        if 'user_agent' not in self.query or 'workspace_id' not in self.query:
+            return 400, 'user_agent and workspace_id are required'
+
+        since = self.query.get('since', '0000-00-00')
+        until = self.query.get('until', '9999-99-99')
+
+        entries = sorted(
+            (e for e in state.time_entries.values()
+             if e['wid'] == int(self.query['workspace_id']) and since <= e['start'][:10] <= until),
+            key=lambda e: e['start'],
+            reverse=True
+        )
+
+        page = int(self.query.get('page', 1))
+        data = []
+        for entry in entries[(page - 1) * REPORT_PAGE_SIZE:page * REPORT_PAGE_SIZE]:
+            project = state.projects.get(entry.get('pid'))
+            duration = entry['duration'] if entry['duration'] >= 0 else int(time.time()) + entry['duration']
+            data.append({
+                'id': entry['id'],
+                'pid': entry.get('pid'),
+                'description': entry['description'],
+                'start': entry['start'],
+                'end': entry.get('stop'),
+                'updated': entry['at'],
+                'dur': duration * 1000,
+                'project': project['name'] if project else None,
+                'billable': None,
+                'is_billable': entry['billable'],
+                'tags': entry['tags'],
+            })
+
+        return 200, {
+            'total_grand': sum(e['dur'] for e in data),
+            'total_count': len(entries),
+            'per_page': REPORT_PAGE_SIZE,
+            'data': data,
+        }
+
+
+class FakeTogglServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, fail_rate: float = 0.0,
+                 fail_status: int = 500, state: Optional[TogglState] = None, seed: int = 0) -> None:
+        super().__init__(('127.0.0.1', port), FakeTogglHandler)
+
+        self.state = state or TogglState()
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+
+        # Seconds sent in the Retry-After header of 429 responses
+        self.retry_after: Optional[float] = None
+
+        # `since` of the last /me response
+        self.last_since: Optional[int] = None
+
+        self._random = random.Random(seed)
+        self._queued_failures: List[int] = []
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self) -> 'FakeTogglServer':
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def fail_next(self, count: int = 1, status: int = 500) -> None:
+        """ Make the next `count` requests fail with `status`. """
+        with self._stats_lock:
+            self._queued_failures.extend([status] * count)
+
+    def next_failure(self) -> Optional[int]:
+        with self._stats_lock:
+            if self._queued_failures:
+                return self._queued_failures.pop(0)
+
+            if self.fail_rate and self._random.random() < self.fail_rate:
+                return self.fail_status
+
+        return None
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.stats = {'requests': [], 'connections': 0, 'bytes_received': 0, 'bytes_sent': 0}
+
+    def record_connection(self) -> None:
+        with self._stats_lock:
+            self.stats['connections'] += 1
+
+    def record_request(self, method: str, path: str, status: int, request_bytes: int, response_bytes: int) -> None:
+        with self._stats_lock:
+            self.stats['requests'].append({'method': method, 'path': path, 'status': status})
+            self.stats['bytes_received'] += request_bytes
+            self.stats['bytes_sent'] += response_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run a fake Toggl API server.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests that fail.')
+    parser.add_argument('--fail-status', type=int, default=500, help='Status code of the failed requests.')
+    parser.add_argument('--workspaces', type=int, default=1)
+    parser.add_argument('--projects', type=int, default=0, help='Projects in every workspace.')
+    args = parser.parse_args()
+
+    server = FakeTogglServer(
+        port=args.port,
+        latency=args.latency,
+        fail_rate=args.fail_rate,
+        fail_status=args.fail_status,
+        state=TogglState(args.workspaces, args.projects)
+    )
+
+    print(f'Fake Toggl API running on {server.url} (API token: {API_TOKEN})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -18,18 +18,20 @@ class TestHelpMessages(unittest.TestCase):
 
     def test_empty_tgl_command(self) -> None:
         out = run_command("tgl")
-        self.assertIn("usage: tgl [-h] <commands> ...", out)
+        self.assertIn("usage: tgl [-h] [--timeout SECONDS] [--trace] <commands> ...", out)
 
     def test_help_commands(self) -> None:
         out1 = run_command("tgl -h")
-        self.assertIn("usage: tgl [-h] <commands> ...", out1)
+        self.assertIn("usage: tgl [-h] [--timeout SECONDS] [--trace] <commands> ...", out1)
 
         out2 = run_command("tgl --help")
-        self.assertIn("usage: tgl [-h] <commands> ...", out2)
+        self.assertIn("usage: tgl [-h] [--timeout SECONDS] [--trace] <commands> ...", out2)
+        self.assertRegex(out2, r"--timeout SECONDS\s* Seconds the command can wait for Toggl in total.")
+        self.assertRegex(out2, r"--trace \s* Print how long every phase and request of the command\s*took.")
 
     def test_wrong_command(self) -> None:
         out = run_command("tgl error", error=True)
-        self.assertIn("usage: tgl [-h] <commands> ...", out)
+        self.assertIn("usage: tgl [-h] [--timeout SECONDS] [--trace] <commands> ...", out)
         self.assertIn("tgl: error: argument <commands>: invalid choice: 'error' (choose from", out)
 
     def test_setup_help_command(self) -> None:
@@ -49,63 +51,112 @@ class TestHelpMessages(unittest.TestCase):
         self.assertRegex(out1, self.generic_help_argument_regex)
 
         out2 = run_command("tgl reconfig --help")
-        self.assertIn("usage: tgl reconfig [-h]", out2)
+        self.assertIn("usage: tgl reconfig [-h] [-f | -w WORKSPACE | -p]", out2)
         self.assertRegex(out2, self.generic_help_argument_regex)
+        self.assertRegex(out2, r"-f, --full \s* Download everything again instead of only what changed")
+        self.assertRegex(out2, r"-w WORKSPACE, --workspace WORKSPACE\s* Only download the projects of the workspace")
+        self.assertRegex(out2, r"-p, --projects-only \s* Only reconfigure the projects")
 
     def test_start_help_message(self) -> None:
         out1 = run_command("tgl start -h")
-        self.assertRegex(out1, r"usage: tgl start \[-h] \[-p] \[-t \[TAGS .* \[-w] \[-b] description")
+        self.assertRegex(out1, r"usage: tgl start \[-h] \[-p \| -n NAME] \[-t \[TAGS .* \[-w] \[-b] \[-c]\s*description")
         self.assertRegex(out1, self.generic_help_argument_regex)
         self.assertRegex(out1, r"description \s* Timer description, use quotes around it unless it is\n\s* one word.")
         self.assertRegex(out1, r"-p, --project \s* Start timer in select project.")
+        self.assertRegex(out1, r"-n NAME, --project-name NAME\s* Start timer in the project with this NAME")
         self.assertRegex(out1, r"-t \[TAGS .*\s* --tags .*\s* Space seperated .*\s* multiple .*\s* quotes.")
         self.assertRegex(out1, r"-w, --workspace \s* Select workspace to use for timer.")
         self.assertRegex(out1, r"-b, --billable \s* Set as billable hours. \(For Toggl Pro members only\).")
+        self.assertRegex(out1, r"-c, --confirm \s* Ask before stopping a timer that is already running.")
 
         out2 = run_command("tgl start --help")
 
-        self.assertRegex(out2, r"usage: tgl start \[-h] \[-p] \[-t \[TAGS .* \[-w] \[-b] description")
+        self.assertRegex(out2, r"usage: tgl start \[-h] \[-p \| -n NAME] \[-t \[TAGS .* \[-w] \[-b] \[-c]\s*description")
         self.assertRegex(out2, self.generic_help_argument_regex)
         self.assertRegex(out2, r"description \s* Timer description, use quotes around it unless it is\n\s* one word.")
         self.assertRegex(out2, r"-p, --project \s* Start timer in select project.")
+        self.assertRegex(out2, r"-n NAME, --project-name NAME\s* Start timer in the project with this NAME")
         self.assertRegex(out2, r"-t \[TAGS .*\s* --tags .*\s* Space seperated .*\s* multiple .*\s* quotes.")
         self.assertRegex(out2, r"-w, --workspace \s* Select workspace to use for timer.")
         self.assertRegex(out2, r"-b, --billable \s* Set as billable hours. \(For Toggl Pro members only\).")
+        self.assertRegex(out2, r"-c, --confirm \s* Ask before stopping a timer that is already running.")
 
     def test_current_help_message(self) -> None:
         out1 = run_command("tgl current -h")
-        self.assertIn("usage: tgl current [-h]", out1)
+        self.assertIn("usage: tgl current [-h] [-r]", out1)
         self.assertRegex(out1, self.generic_help_argument_regex)
+        self.assertRegex(out1, r"-r, --refresh \s* Get the current timer from Toggl instead of the cache.")
 
         out2 = run_command("tgl current --help")
-        self.assertIn("usage: tgl current [-h]", out2)
+        self.assertIn("usage: tgl current [-h] [-r]", out2)
         self.assertRegex(out2, self.generic_help_argument_regex)
+        self.assertRegex(out2, r"-r, --refresh \s* Get the current timer from Toggl instead of the cache.")
 
     def test_stop_help_message(self) -> None:
         out1 = run_command("tgl stop -h")
-        self.assertIn("usage: tgl stop [-h]", out1)
+        self.assertIn("usage: tgl stop [-h] [-r]", out1)
         self.assertRegex(out1, self.generic_help_argument_regex)
+        self.assertRegex(out1, r"-r, --refresh \s* Get the current timer from Toggl instead of the cache.")
 
         out2 = run_command("tgl stop --help")
-        self.assertIn("usage: tgl stop [-h]", out2)
+        self.assertIn("usage: tgl stop [-h] [-r]", out2)
         self.assertRegex(out2, self.generic_help_argument_regex)
+        self.assertRegex(out2, r"-r, --refresh \s* Get the current timer from Toggl instead of the cache.")
 
     def test_pause_help_message(self) -> None:
         out1 = run_command("tgl pause -h")
-        self.assertIn("usage: tgl pause [-h]", out1)
+        self.assertIn("usage: tgl pause [-h] [-r]", out1)
         self.assertRegex(out1, self.generic_help_argument_regex)
+        self.assertRegex(out1, r"-r, --refresh \s* Get the current timer from Toggl instead of the cache.")
 
         out2 = run_command("tgl pause --help")
-        self.assertIn("usage: tgl pause [-h]", out2)
+        self.assertIn("usage: tgl pause [-h] [-r]", out2)
         self.assertRegex(out2, self.generic_help_argument_regex)
+        self.assertRegex(out2, r"-r, --refresh \s* Get the current timer from Toggl instead of the cache.")
 
     def test_resume_help_message(self) -> None:
         out1 = run_command("tgl resume -h")
-        self.assertIn("usage: tgl resume [-h]", out1)
+        self.assertIn("usage: tgl resume [-h] [-r]", out1)
         self.assertRegex(out1, self.generic_help_argument_regex)
+        self.assertRegex(out1, r"-r, --refresh \s* Get the current timer from Toggl instead of the cache.")
 
         out2 = run_command("tgl resume --help")
-        self.assertIn("usage: tgl resume [-h]", out2)
+        self.assertIn("usage: tgl resume [-h] [-r]", out2)
+        self.assertRegex(out2, self.generic_help_argument_regex)
+        self.assertRegex(out2, r"-r, --refresh \s* Get the current timer from Toggl instead of the cache.")
+
+    def test_report_help_message(self) -> None:
+        out1 = run_command("tgl report -h")
+        self.assertRegex(out1, r"usage: tgl report \[-h] \[-s SINCE] \[-u UNTIL] \[-b \{day,project,tag,workspace}]\s*\[-w]")
+        self.assertRegex(out1, self.generic_help_argument_regex)
+        self.assertRegex(out1, r"-s SINCE, --since SINCE\s* First day of the report as YYYY-MM-DD.")
+        self.assertRegex(out1, r"-u UNTIL, --until UNTIL\s* Last day of the report as YYYY-MM-DD.")
+        self.assertRegex(out1, r"--by \{day,project,tag,workspace}\s* Only total the time by this group.")
+
+        out2 = run_command("tgl report --help")
+        self.assertRegex(out2, r"usage: tgl report \[-h] \[-s SINCE] \[-u UNTIL] \[-b \{day,project,tag,workspace}]\s*\[-w]")
+        self.assertRegex(out2, self.generic_help_argument_regex)
+
+    def test_export_help_message(self) -> None:
+        out1 = run_command("tgl export -h")
+        self.assertRegex(out1, r"usage: tgl export \[-h] \[-s SINCE] \[-u UNTIL] \[-f \{csv,jsonl}] \[-o OUTPUT]\s*\[-w]")
+        self.assertRegex(out1, self.generic_help_argument_regex)
+        self.assertRegex(out1, r"--format \{csv,jsonl}\s* Format of the exported time entries.")
+        self.assertRegex(out1, r"-o OUTPUT, --output OUTPUT\s* File to write the time entries to")
+
+        out2 = run_command("tgl export --help")
+        self.assertRegex(out2, r"usage: tgl export \[-h] \[-s SINCE] \[-u UNTIL] \[-f \{csv,jsonl}] \[-o OUTPUT]\s*\[-w]")
+        self.assertRegex(out2, self.generic_help_argument_regex)
+
+    def test_import_help_message(self) -> None:
+        out1 = run_command("tgl import -h")
+        self.assertIn("usage: tgl import [-h] [-f {csv,jsonl}] file", out1)
+        self.assertRegex(out1, self.generic_help_argument_regex)
+        self.assertRegex(out1, r"file \s* File with the time entries, with the same columns as")
+        self.assertRegex(out1, r"--format \{csv,jsonl}\s* Format of the file.")
+
+        out2 = run_command("tgl import --help")
+        self.assertIn("usage: tgl import [-h] [-f {csv,jsonl}] file", out2)
         self.assertRegex(out2, self.generic_help_argument_regex)
 
     def test_create_help_message(self) -> None:
@@ -121,6 +172,19 @@ class TestHelpMessages(unittest.TestCase):
         self.assertRegex(out2, r"name \s* Name for the project.")
         self.assertRegex(out2, self.generic_help_argument_regex)
 
+    def test_daemon_help_message(self) -> None:
+        out1 = run_command("tgl daemon -h")
+        self.assertIn("usage: tgl daemon [-h] [--stop | --status]", out1)
+        self.assertRegex(out1, self.generic_help_argument_regex)
+        self.assertRegex(out1, r"--stop \s* Stop the running daemon.")
+        self.assertRegex(out1, r"--status \s* Check if the daemon is running.")
+
+        out2 = run_command("tgl daemon --help")
+        self.assertIn("usage: tgl daemon [-h] [--stop | --status]", out2)
+        self.assertRegex(out2, self.generic_help_argument_regex)
+        self.assertRegex(out2, r"--stop \s* Stop the running daemon.")
+        self.assertRegex(out2, r"--status \s* Check if the daemon is running.")
+
 
 if __name__ == "__main__":
     unittest.main()
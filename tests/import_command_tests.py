@@ -0,0 +1,91 @@
+import os
+import json
+import unittest
+
+from tests.utils import FakeTogglTestCase
+
+
+class TestImportCommand(FakeTogglTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        with self.server.state.lock:
+            self.project = next(iter(self.server.state.projects.values()))
+
+    def _write(self, name: str, content: str) -> str:
+        path = os.path.join(self.data_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _imported_entries(self) -> list:
+        with self.server.state.lock:
+            return sorted(self.server.state.time_entries.values(), key=lambda e: e['description'])
+
+    def test_import_csv(self) -> None:
+        """ Test that every row of a CSV file is created as a completed time entry. """
+        rows = ''.join(f'entry {i},{self.project["id"]},2021-03-01T09:00:00+00:00,,60,"a,b"\n' for i in range(10))
+        path = self._write('entries.csv', 'description,project_id,start,stop,duration,tags\n' + rows)
+
+        output = self._run_command(['import', path])
+
+        self.assertIn('Imported 10 time entries.', output)
+        entries = self._imported_entries()
+        self.assertEqual(len(entries), 10)
+        self.assertEqual(entries[0]['pid'], self.project['id'])
+        self.assertEqual(entries[0]['wid'], self.project['wid'])
+        self.assertEqual(entries[0]['duration'], 60)
+        self.assertEqual(entries[0]['tags'], ['a', 'b'])
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+
+    def test_import_jsonl_with_stop_time(self) -> None:
+        """ Test that JSON lines files are read and the duration comes from the stop time. """
+        row = {'description': 'entry', 'start': '2021-03-01T09:00:00+00:00', 'stop': '2021-03-01T10:00:00+00:00'}
+        path = self._write('entries.jsonl', json.dumps(row) + '\n')
+
+        output = self._run_command(['import', path])
+
+        self.assertIn('Imported 1 time entries.', output)
+        self.assertEqual(self._imported_entries()[0]['duration'], 3600)
+
+    def test_invalid_rows_are_skipped(self) -> None:
+        """ Test that rows with projects or workspaces that are not in the config file are not sent. """
+        path = self._write('entries.csv', (
+            'description,workspace_id,project_id,start,duration\n'
+            'valid,,,2021-03-01T09:00:00+00:00,60\n'
+            'unknown project,,1,2021-03-01T09:00:00+00:00,60\n'
+            'unknown workspace,2,,2021-03-01T09:00:00+00:00,60\n'
+            'no duration,,,2021-03-01T09:00:00+00:00,\n'
+        ))
+
+        output = self._run_command(['import', path])
+
+        self.assertIn('Row 2 skipped: project 1 is not in workspace', output)
+        self.assertIn('Row 3 skipped: workspace 2 is not in the config file.', output)
+        self.assertIn('Row 4 skipped: the duration or the stop time is needed.', output)
+        self.assertIn('ERROR: 3 rows were not imported.', output)
+        self.assertEqual(self._requests(), ['POST /api/v8/time_entries'])
+
+    def test_failed_import_continues(self) -> None:
+        """ Test that running a failed import again only sends the rows that were not created. """
+        rows = ''.join(f'entry {i},2021-03-01T09:00:00+00:00,60\n' for i in range(5))
+        path = self._write('entries.csv', 'description,start,duration\n' + rows)
+
+        self.server.fail_next(1, status=500)
+        output = self._run_command(['import', path])
+
+        self.assertIn('Imported 4 time entries.', output)
+        self.assertIn('could not be imported. Response: 500', output)
+        self.assertTrue(os.path.exists(path + '.checkpoint'))
+
+        output = self._run_command(['import', path])
+
+        self.assertIn('Imported 1 time entries.', output)
+        self.assertIn('4 rows were imported before and skipped.', output)
+        self.assertEqual(len(self._requests()), 1)
+        self.assertEqual(len(self._imported_entries()), 5)
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+
+
+if __name__ == '__main__':
+    unittest.main()
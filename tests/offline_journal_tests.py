@@ -0,0 +1,135 @@
+import os
+import time
+import fcntl
+import unittest
+import subprocess
+
+from tests.utils import FakeTogglTestCase
+
+
+class TestOfflineJournal(FakeTogglTestCase):
+    def _entries(self) -> list:
+        return sorted(self.server.state.time_entries.values(), key=lambda entry: entry['id'])
+
+    def test_start_offline(self) -> None:
+        """ Test that a timer started without a connection is saved in the journal. """
+        output = self._run_command(['start', 'offline timer'], offline=True)
+
+        self.assertIn('Timer started offline. It will be sent to Toggl the next time tgl can connect.', output)
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, 'journal.jsonl')))
+        self.assertEqual(self._entries(), [])
+
+        output = self._run_command(['current'], offline=True)
+        self.assertRegex(output, r'Description:\s*offline timer')
+
+    def test_journal_is_sent_when_online(self) -> None:
+        """ Test that the journaled actions are sent in order by the next command that can connect. """
+        self._run_command(['start', 'first'], offline=True)
+        self._run_command(['pause'], offline=True)
+        self._run_command(['start', 'second'], offline=True)
+
+        output = self._run_command(['current'])
+
+        self.assertRegex(output, r'Description:\s*second')
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, 'journal.jsonl')))
+        self.assertEqual(self.server.stats['connections'], 1)
+
+        entries = self._entries()
+        self.assertEqual([entry['description'] for entry in entries], ['first', 'second'])
+        self.assertGreaterEqual(entries[0]['duration'], 0)
+        self.assertLess(entries[1]['duration'], 0)
+
+    def test_actions_stay_in_order_while_offline(self) -> None:
+        """ Test that online actions wait for the journaled ones to be sent first. """
+        self._run_command(['start', 'offline timer'], offline=True)
+
+        output = self._run_command(['stop'])
+
+        self.assertIn('Timer "offline timer" stopped.', output)
+        self.assertEqual([entry['description'] for entry in self._entries()], ['offline timer'])
+        self.assertGreaterEqual(self._entries()[0]['duration'], 0)
+
+    def test_refreshed_stop_offline(self) -> None:
+        """ Test that stopping with --refresh without a connection stops the timer tgl knows about. """
+        self._run_command(['start', 'offline timer'], offline=True)
+
+        output = self._run_command(['stop', '--refresh'], offline=True)
+
+        self.assertIn('Timer "offline timer" stopped offline.', output)
+
+        output = self._run_command(['current'], offline=True)
+        self.assertIn('There is no timer currently running.', output)
+
+    def test_record_waits_for_the_journal_lock(self) -> None:
+        """ Test that an action isn't written to the journal while another process holds its lock. """
+        env = dict(self.env, TGL_API_URL='http://127.0.0.1:9')
+
+        with open(os.path.join(self.data_dir, 'journal.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            command = subprocess.Popen(['tgl', 'start', 'offline timer'], stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, env=env)
+            time.sleep(1)
+
+            self.assertIsNone(command.poll())
+            self.assertFalse(os.path.exists(os.path.join(self.data_dir, 'journal.jsonl')))
+
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+        output = command.communicate(timeout=10)[0].decode('utf-8')
+
+        self.assertIn('Timer started offline.', output)
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, 'journal.jsonl')))
+
+    def test_failed_action_stays_in_journal(self) -> None:
+        """ Test that an action Toggl fails to handle is kept with the ones after it and sent later. """
+        self._run_command(['start', 'first'], offline=True)
+        self._run_command(['start', 'second'], offline=True)
+
+        # The look up of the running timer works, starting the first one doesn't
+        self.server.fail_next(status=500)
+        output = self._run_command(['current'])
+
+        self.assertIn('could not be sent to Toggl. Response: 500', output)
+        self.assertEqual(self._entries(), [])
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, 'journal.jsonl')))
+
+        output = self._run_command(['current'])
+
+        self.assertRegex(output, r'Description:\s*second')
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, 'journal.jsonl')))
+        self.assertEqual([entry['description'] for entry in self._entries()], ['first', 'second'])
+
+    def test_refused_action_is_dropped(self) -> None:
+        """ Test that an action Toggl will never accept is dropped and the next ones are still sent. """
+        self._run_command(['start', 'first'], offline=True)
+        self._run_command(['start', 'second'], offline=True)
+
+        self.server.fail_next(status=400)
+        output = self._run_command(['current'])
+
+        self.assertIn('was refused by Toggl and dropped. Response: 400', output)
+        self.assertRegex(output, r'Description:\s*second')
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, 'journal.jsonl')))
+        self.assertEqual([entry['description'] for entry in self._entries()], ['second'])
+
+    def test_timed_out_start_is_not_sent_twice(self) -> None:
+        """ Test that a start that reached Toggl after its request timed out doesn't create a second timer. """
+        self.server.latency = 1
+        output = self._run_command(['--timeout', '0.5', 'start', 'description'])
+        self.assertIn('Timer started offline.', output)
+
+        # Let the server finish the request the command gave up on
+        time.sleep(1)
+        self.server.latency = 0
+        self.assertEqual([entry['description'] for entry in self._entries()], ['description'])
+
+        output = self._run_command(['current'])
+
+        self.assertRegex(output, r'Description:\s*description')
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, 'journal.jsonl')))
+        self.assertEqual([entry['description'] for entry in self._entries()], ['description'])
+
+
+if __name__ == "__main__":
+    unittest.main()
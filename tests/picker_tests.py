@@ -0,0 +1,103 @@
+import unittest
+
+from tests.utils import FakeTogglTestCase
+
+
+class TestPicker(FakeTogglTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        with self.server.state.lock:
+            self.workspace_id = self.server.state.default_wid
+            self.projects = {
+                p['name']: p['id'] for p in self.server.state.projects.values() if p['wid'] == self.workspace_id
+            }
+            for i in range(45):
+                project = self.server.state.add_project(self.workspace_id, f'Client {i:02}')
+                self.projects[project['name']] = project['id']
+
+        self._run_command(['reconfig'])
+
+    def _started_project_id(self):
+        with self.server.state.lock:
+            return self.server.state.current_entry().get('pid')
+
+    def test_first_page(self) -> None:
+        """ Test that only the first page of a long project list is shown. """
+        output = self._run_command(['start', 'description', '-p'], user_input='1\n')
+
+        self.assertIn('1: Client 00', output)
+        self.assertIn('20: Client 19', output)
+        self.assertNotIn('21: ', output)
+        self.assertIn('(Showing 1-20 of 48. Type part of a name (after a / if it\'s a number) to narrow the list, '
+                      'or press enter for the next page.)', output)
+        self.assertEqual(self._started_project_id(), self.projects['Client 00'])
+
+    def test_next_page(self) -> None:
+        """ Test that enter shows the next page and that its numbers keep counting. """
+        output = self._run_command(['start', 'description', '-p'], user_input='\n21\n')
+
+        self.assertIn('21: Client 20', output)
+        self.assertIn('(Showing 21-40 of 48', output)
+        self.assertEqual(self._started_project_id(), self.projects['Client 20'])
+
+    def test_narrow(self) -> None:
+        """ Test that typing part of a name narrows the list, and typing more narrows it further. """
+        output = self._run_command(['start', 'description', '-p'], user_input='client 3\nclient 34\n1\n')
+
+        self.assertIn('(Showing 1-10 of 10 matching "client 3".', output)
+        self.assertIn('(Showing 1-1 of 1 matching "client 34".', output)
+        self.assertEqual(self._started_project_id(), self.projects['Client 34'])
+
+    def test_narrow_by_number(self) -> None:
+        """ Test that a number after a / narrows the list instead of picking that number. """
+        output = self._run_command(['start', 'description', '-p'], user_input='/34\n1\n')
+
+        self.assertIn('(Showing 1-1 of 1 matching "34".', output)
+        self.assertEqual(self._started_project_id(), self.projects['Client 34'])
+
+    def test_no_match(self) -> None:
+        """ Test that a name matching nothing says so and a new one searches every project again. """
+        output = self._run_command(['start', 'description', '-p'], user_input='zzz\nproject 2\n1\n')
+
+        self.assertIn('Nothing matches "zzz".', output)
+        self.assertEqual(self._started_project_id(), self.projects['Project 2'])
+
+    def test_no_project(self) -> None:
+        """ Test that 0 still starts the timer without a project. """
+        output = self._run_command(['start', 'description', '-p'], user_input='0\n')
+
+        self.assertIn('Timer started.', output)
+        self.assertIsNone(self._started_project_id())
+
+    def test_invalid_number(self) -> None:
+        """ Test that a number that is not in the list starts nothing. """
+        output = self._run_command(['start', 'description', '-p'], user_input='49\n')
+
+        self.assertIn('ERROR: Selection not valid. Timer not started.', output)
+        self.assertEqual(self._requests(), [])
+
+    def test_nothing_entered(self) -> None:
+        """ Test that the picker stops when the input ends. """
+        output = self._run_command(['start', 'description', '-p'], user_input='')
+
+        self.assertIn('ERROR: Nothing was selected.', output)
+        self.assertEqual(self._requests(), [])
+
+    def test_delete_numbers(self) -> None:
+        """ Test that every project of every workspace has its own number when deleting. """
+        output = self._run_command(['delete', 'project'], user_input='workspace 2\n2\n')
+
+        self.assertIn('1: Project 1 (Workspace 2)', output)
+        self.assertIn('2: Project 2 (Workspace 2)', output)
+        self.assertIn('Project was deleted.', output)
+
+        with self.server.state.lock:
+            names = [(p['wid'], p['name']) for p in self.server.state.projects.values()]
+
+        self.assertIn((self.workspace_id, 'Project 2'), names)
+        self.assertEqual(len([name for wid, name in names if name == 'Project 2']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from tgl.ratelimit import SharedTokenBucket
+from tests.utils import FakeTogglTestCase
+
+
+class TestRetries(FakeTogglTestCase):
+    def test_too_many_requests_is_retried_after_the_wait_asked(self) -> None:
+        """ Test that a 429 response is sent again after the seconds in its Retry-After header. """
+        self.server.retry_after = 1
+        self.server.fail_next(1, status=429)
+
+        start = time.perf_counter()
+        output = self._run_command(['current', '--refresh'])
+
+        self.assertGreaterEqual(time.perf_counter() - start, 1)
+        self.assertIn('There is no timer currently running.', output)
+        self.assertEqual(self._requests(), ['GET /api/v8/time_entries/current'] * 2)
+
+    def test_unavailable_server_is_retried(self) -> None:
+        """ Test that the requests that fail with a 503 response are sent again. """
+        self.server.fail_next(2, status=503)
+
+        output = self._run_command(['start', 'description'])
+
+        self.assertIn('Timer started.', output)
+        self.assertEqual(self._requests(), ['POST /api/v8/time_entries/start'] * 3)
+
+    def test_server_error_is_not_retried(self) -> None:
+        """ Test that a 500 response is not sent again, since Toggl may have handled the request. """
+        self.server.fail_next(1, status=500)
+
+        output = self._run_command(['start', 'description'])
+
+        self.assertIn('ERROR: Timer not started. Response: 500', output)
+        self.assertEqual(len(self._requests()), 1)
+
+    def test_bad_gateway_is_only_retried_for_idempotent_requests(self) -> None:
+        """ Test that a 502 response is sent again for a GET but not for a POST, which Toggl may have handled. """
+        self.server.fail_next(1, status=502)
+        output = self._run_command(['current', '--refresh'])
+
+        self.assertIn('There is no timer currently running.', output)
+        self.assertEqual(self._requests(), ['GET /api/v8/time_entries/current'] * 2)
+
+        self.server.reset_stats()
+        self.server.fail_next(1, status=502)
+        output = self._run_command(['start', 'description'])
+
+        self.assertIn('ERROR: Timer not started. Response: 502', output)
+        self.assertEqual(self._requests(), ['POST /api/v8/time_entries/start'])
+
+
+class TestSharedTokenBucket(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ratelimit.json')
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+        return super().tearDown()
+
+    def test_buckets_share_their_tokens(self) -> None:
+        """ Test that a token taken by one bucket is missing from another bucket with the same file. """
+        first = SharedTokenBucket(self.path, rate=5, capacity=1)
+        second = SharedTokenBucket(self.path, rate=5, capacity=1)
+
+        start = time.perf_counter()
+        first.acquire()
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+        second.acquire()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import unittest
+
+from tests.fake_toggl import API_TOKEN, now
+from tests.utils import FakeTogglTestCase
+from tgl.catalog import ProjectCatalog
+
+
+class TestReconfigCommand(FakeTogglTestCase):
+    workspace_count = 5
+
+    def _config(self) -> dict:
+        config = {}
+        for file_name in ('credentials.json', 'catalog.json'):
+            with open(os.path.join(self.data_dir, file_name)) as f:
+                config.update(json.load(f))
+
+        projects = ProjectCatalog(os.path.join(self.data_dir, 'projects.bin'))
+        config['PROJECTS'] = {wid: dict(workspace_projects) for wid, workspace_projects in projects.items()}
+
+        return config
+
+    def test_setup_makes_one_request(self) -> None:
+        """ Test that setup downloads every workspace and project with a single request. """
+        output = self._run_command(['setup', '-a'], 'y\n' + API_TOKEN + '\n')
+
+        self.assertIn('Data saved.', output)
+        self.assertEqual(self._requests(), ['GET /api/v8/me'])
+
+        config = self._config()
+        self.assertEqual(len(config['WORKSPACES']), 5)
+        self.assertEqual(sum(len(projects) for projects in config['PROJECTS'].values()), 15)
+        self.assertEqual(config['DEFAULTS']['API_KEY'], API_TOKEN)
+
+    def test_setup_with_wrong_credentials(self) -> None:
+        """ Test that setup stops when the API token is not valid. """
+        output = self._run_command(['setup', '-a'], 'y\nwrong token\n')
+
+        self.assertIn('Error: Incorrect credentials.', output)
+        self.assertEqual(self._requests(), ['GET /api/v8/me'])
+
+    def test_reconfig_makes_one_request(self) -> None:
+        """ Test that reconfig picks up new, archived and deleted projects with a single request. """
+        # `since` is a unix time, so the changes have to happen after the second of the setup
+        time.sleep(1.1)
+
+        with self.server.state.lock:
+            state = self.server.state
+            new_project = state.add_project(state.default_wid, 'New project')
+
+            archived_project, deleted_project = [p for p in state.projects.values() if p['name'] != 'New project'][:2]
+            archived_project['active'] = False
+            archived_project['at'] = now()
+
+        self._run_command(['delete', 'project'], 'project 2 (workspace 1)\n1\n')
+        self._run_command(['reconfig'])
+
+        self.assertEqual(self._requests(), ['GET /api/v8/me'])
+
+        projects = self._config()['PROJECTS'][str(self.server.state.default_wid)]
+        self.assertIn(str(new_project['id']), projects)
+        self.assertNotIn(str(archived_project['id']), projects)
+        self.assertNotIn(str(deleted_project['id']), projects)
+
+    def test_unchanged_account(self) -> None:
+        """ Test that reconfig on an unchanged account only downloads the user. """
+        # The next reconfig asks for the changes from a second before this one, so the
+        # account has to be created before that second
+        time.sleep(1.1)
+        self._run_command(['reconfig', '--full'])
+        full_size = self.server.stats['bytes_sent']
+
+        config = self._config()
+        self._run_command(['reconfig'])
+
+        self.assertEqual(self._requests(), ['GET /api/v8/me'])
+        self.assertLess(self.server.stats['bytes_sent'], 500)
+        self.assertLess(self.server.stats['bytes_sent'], full_size)
+        self.assertEqual(self._config()['PROJECTS'], config['PROJECTS'])
+        self.assertEqual(self._config()['WORKSPACES'], config['WORKSPACES'])
+
+    def test_renamed_workspace(self) -> None:
+        """ Test that a workspace renamed after the last reconfig is renamed in the config. """
+        time.sleep(1.1)
+
+        with self.server.state.lock:
+            workspace = self.server.state.workspaces[self.server.state.default_wid]
+            workspace['name'] = 'Renamed workspace'
+            workspace['at'] = now()
+
+        self._run_command(['reconfig'])
+
+        config = self._config()
+        self.assertEqual(config['WORKSPACES'][str(self.server.state.default_wid)], 'Renamed workspace')
+        self.assertEqual(len(config['WORKSPACES']), 5)
+
+    def test_full_reconfig(self) -> None:
+        """ Test that --full downloads everything again without sending the time of the last reconfig. """
+        os.unlink(os.path.join(self.data_dir, 'projects.bin'))
+
+        self._run_command(['reconfig', '--full'])
+
+        self.assertEqual(sum(len(projects) for projects in self._config()['PROJECTS'].values()), 15)
+
+    def test_one_workspace(self) -> None:
+        """ Test that --workspace only downloads and changes the projects of that workspace. """
+        with self.server.state.lock:
+            state = self.server.state
+            workspace_ids = list(state.workspaces)
+            new_project = state.add_project(workspace_ids[1], 'New project')
+            other_project = state.add_project(workspace_ids[2], 'Other project')
+
+        config = self._config()
+        self._run_command(['reconfig', '--workspace', 'workspace 2'])
+
+        self.assertEqual(self._requests(), [f'GET /api/v8/workspaces/{workspace_ids[1]}/projects'])
+
+        new_config = self._config()
+        self.assertIn(str(new_project['id']), new_config['PROJECTS'][str(workspace_ids[1])])
+        self.assertNotIn(str(other_project['id']), new_config['PROJECTS'][str(workspace_ids[2])])
+        self.assertEqual(new_config['SYNC'], config['SYNC'])
+
+        self._run_command(['reconfig', '-w', str(workspace_ids[2])])
+        self.assertIn(str(other_project['id']), self._config()['PROJECTS'][str(workspace_ids[2])])
+
+    def test_unknown_workspace(self) -> None:
+        """ Test that nothing is downloaded for a workspace that is not in the config file. """
+        output = self._run_command(['reconfig', '--workspace', 'nope'])
+
+        self.assertIn('ERROR: There is no workspace "nope" in the config file.', output)
+        self.assertEqual(self._requests(), [])
+
+    def test_workspace_with_other_options(self) -> None:
+        """ Test that --workspace can't be given with --full or --projects-only. """
+        for option in ('-f/--full', '-p/--projects-only'):
+            output = self._run_command(['reconfig', '--workspace', 'nope', option.split('/')[1]])
+
+            self.assertIn(f'argument {option}: not allowed with argument -w/--workspace', output)
+            self.assertEqual(self._requests(), [])
+
+    def test_projects_only(self) -> None:
+        """ Test that --projects-only leaves the workspaces and defaults alone. """
+        time.sleep(1.1)
+
+        with self.server.state.lock:
+            state = self.server.state
+            new_project = state.add_project(state.default_wid, 'New project')
+
+            workspace = state.workspaces[state.default_wid]
+            workspace['name'] = 'Renamed workspace'
+            workspace['at'] = now()
+
+        config = self._config()
+        self._run_command(['reconfig', '--projects-only'])
+
+        new_config = self._config()
+        self.assertIn(str(new_project['id']), new_config['PROJECTS'][str(self.server.state.default_wid)])
+        self.assertEqual(new_config['WORKSPACES'], config['WORKSPACES'])
+        self.assertEqual(new_config['SYNC'], config['SYNC'])
+
+        # The skipped rename is picked up by the next reconfig
+        self._run_command(['reconfig'])
+        self.assertEqual(self._config()['WORKSPACES'][str(self.server.state.default_wid)], 'Renamed workspace')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from datetime import date, timedelta
+
+from tests.utils import FakeTogglTestCase
+
+
+class TestReportCommand(FakeTogglTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        state = self.server.state
+        with state.lock:
+            first_workspace, second_workspace = list(state.workspaces)
+            project_id = next(p['id'] for p in state.projects.values() if p['wid'] == first_workspace)
+
+            # More entries than fit in a page of the report
+            for i in range(60):
+                state.add_time_entry(first_workspace, f'entry {i}', '2021-03-01T09:00:00+00:00', 60,
+                                     project_id=project_id, tags=['billing'])
+            state.add_time_entry(second_workspace, 'other', '2021-03-02T09:00:00+00:00', 3600,
+                                 tags=['billing', 'meeting'])
+            state.add_time_entry(second_workspace, 'outside the range', '2021-04-01T09:00:00+00:00', 3600)
+
+    def test_report_totals(self) -> None:
+        """ Test that the report totals every page of time entries in the range by each group. """
+        output = self._run_command(['report', '--since', '2021-03-01', '--until', '2021-03-07'])
+
+        self.assertIn('Report from 2021-03-01 to 2021-03-07', output)
+        self.assertRegex(output, r'By day:\n\s*2021-03-01\s*1:00:00\n\s*2021-03-02\s*1:00:00')
+        self.assertRegex(output, r'By project:\n\s*\(No project\)\s*1:00:00\n\s*Project \d\s*1:00:00')
+        self.assertRegex(output, r'By tag:\n\s*billing\s*2:00:00\n\s*meeting\s*1:00:00')
+        self.assertRegex(output, r'By workspace:\n\s*Workspace 1\s*1:00:00\n\s*Workspace 2\s*1:00:00')
+        self.assertIn('Total: 2:00:00', output)
+
+        # Two pages for the first workspace and one for the second
+        self.assertEqual(len(self._requests()), 3)
+
+    def test_report_by_one_group(self) -> None:
+        """ Test that --by only prints the totals of that group. """
+        output = self._run_command(['report', '-s', '2021-03-01', '-u', '2021-03-07', '--by', 'tag'])
+
+        self.assertIn('By tag:', output)
+        self.assertNotIn('By day:', output)
+        self.assertNotIn('By project:', output)
+
+    def test_default_range(self) -> None:
+        """ Test that the report covers the last seven days by default. """
+        output = self._run_command(['report'])
+
+        today = date.today()
+        self.assertIn(f'Report from {today - timedelta(days=6)} to {today}', output)
+        self.assertIn('Total: 0:00:00', output)
+
+    def test_invalid_range(self) -> None:
+        """ Test that a range that ends before it starts is an error. """
+        output = self._run_command(['report', '--since', '2021-03-07', '--until', '2021-03-01'])
+
+        self.assertIn('ERROR: The first day of the range is after the last one.', output)
+        self.assertEqual(self._requests(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
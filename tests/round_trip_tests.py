@@ -0,0 +1,69 @@
+import unittest
+
+from tests.utils import FakeTogglTestCase
+
+
+class TestRoundTrips(FakeTogglTestCase):
+    """ Check how many requests each command makes, using the fake Toggl API. """
+
+    def test_start_makes_one_request(self) -> None:
+        """ Test that starting a timer only sends the start request. """
+        output = self._run_command(['start', 'description'])
+
+        self.assertIn('Timer started.', output)
+        self.assertEqual(self._requests(), ['POST /api/v8/time_entries/start'])
+
+    def test_current_after_start_uses_cache(self) -> None:
+        """ Test that the current command doesn't make any request right after a start. """
+        self._run_command(['start', 'description'])
+        output = self._run_command(['current'])
+
+        self.assertRegex(output, r'Description:\s*description')
+        self.assertEqual(self._requests(), [])
+
+    def test_stop_and_pause_make_one_request(self) -> None:
+        """ Test that stop and pause use the id of the started timer instead of looking it up. """
+        self._run_command(['start', 'description'])
+        output = self._run_command(['pause'])
+
+        self.assertIn('Timer "description" paused.', output)
+        self.assertEqual(len(self._requests()), 1)
+        self.assertRegex(self._requests()[0], r'PUT /api/v8/time_entries/\d+/stop')
+
+        self._run_command(['resume'])
+        output = self._run_command(['stop'])
+
+        self.assertIn('Timer "description" stopped.', output)
+        self.assertEqual(len(self._requests()), 1)
+
+    def test_stop_timer_stopped_somewhere_else(self) -> None:
+        """ Test that stop looks up the current timer when the started one was stopped somewhere else. """
+        self._run_command(['start', 'description'])
+
+        # Stop the timer behind tgl's back, as if it was stopped an hour ago on the website
+        with self.server.state.lock:
+            entry = self.server.state.current_entry()
+            self.server.state.stop_entry(entry)
+            entry['stop'] = '2020-01-01T00:00:00+00:00'
+
+        output = self._run_command(['stop'])
+
+        self.assertIn('There is no timer currently running.', output)
+        self.assertEqual(self._requests()[1], 'GET /api/v8/time_entries/current')
+
+    def test_stop_with_a_clock_that_is_ahead(self) -> None:
+        """ Test that stop and pause work when the local clock is minutes ahead of Toggl's. """
+        with self.server.state.lock:
+            self.server.state.clock_offset = -300
+
+        self._run_command(['start', 'description'])
+        output = self._run_command(['pause'])
+        self.assertIn('Timer "description" paused.', output)
+        self.assertEqual(len(self._requests()), 1)
+
+        output = self._run_command(['resume'])
+        self.assertIn('Timer "description" resumed.', output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -35,7 +35,7 @@ class TestStartCommand(unittest.TestCase):
         """ Test the output of and empty start command. """
         output = self._run_command('tgl start')
 
-        self.assertIn('usage: tgl start [-h] [-p] [-t [TAGS [TAGS ...]]] [-w] [-b] description', output)
+        self.assertIn('usage: tgl start [-h] [-p | -n NAME] [-t [TAGS [TAGS ...]]] [-w] [-b] [-c]', output)
         self.assertIn('tgl start: error: the following arguments are required: description', output)
 
     def test_start_with_one_word_description_without_quotes(self) -> None:
@@ -56,7 +56,7 @@ class TestStartCommand(unittest.TestCase):
         """
         output = self._run_command('tgl start description two')
 
-        self.assertIn('usage: tgl [-h] <commands> ...', output)
+        self.assertIn('usage: tgl [-h] [--timeout SECONDS] [--trace] <commands> ...', output)
         self.assertIn('tgl: error: unrecognized arguments: two', output)
 
     def test_start_with_multiword_description_with_quotes(self) -> None:
@@ -0,0 +1,99 @@
+import os
+import json
+import unittest
+
+from tests.utils import FakeTogglTestCase
+from tgl.catalog import ProjectCatalog
+
+
+class TestStartWithProjectName(FakeTogglTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        with self.server.state.lock:
+            self.workspace_id = self.server.state.default_wid
+            self.projects = {
+                p['name']: p['id'] for p in self.server.state.projects.values() if p['wid'] == self.workspace_id
+            }
+
+    def _started_project_id(self):
+        with self.server.state.lock:
+            return self.server.state.current_entry().get('pid')
+
+    def _add_project(self, name: str) -> int:
+        with self.server.state.lock:
+            project_id = self.server.state.add_project(self.workspace_id, name)['id']
+
+        self._run_command(['reconfig'])
+        return project_id
+
+    def test_exact_name(self) -> None:
+        """ Test that the name is matched without asking and ignoring case. """
+        output = self._run_command(['start', 'description', '-n', 'project 2'])
+
+        self.assertIn('Timer started.', output)
+        self.assertNotIn('Please enter the number', output)
+        self.assertEqual(self._started_project_id(), self.projects['Project 2'])
+
+    def test_project_flag_before_description(self) -> None:
+        """ Test that -p still asks for the project when it comes before the description. """
+        output = self._run_command(['start', '-p', 'description'], user_input='0\n')
+
+        self.assertIn('Please enter the number of the project you want to use:', output)
+        self.assertIn('Timer started.', output)
+        self.assertIsNone(self._started_project_id())
+
+    def test_start_of_the_name(self) -> None:
+        """ Test that the start of a name is enough when only one project starts with it. """
+        project_id = self._add_project('Billing Q3')
+
+        output = self._run_command(['start', 'description', '--project-name', 'bill'])
+
+        self.assertIn('Using project "Billing Q3".', output)
+        self.assertEqual(self._started_project_id(), project_id)
+
+    def test_close_name(self) -> None:
+        """ Test that a misspelled name is matched to the only project with a close name. """
+        project_id = self._add_project('Billing Q3')
+
+        output = self._run_command(['start', 'description', '-n', 'biling q3'])
+
+        self.assertIn('Using project "Billing Q3".', output)
+        self.assertEqual(self._started_project_id(), project_id)
+
+    def test_ambiguous_name(self) -> None:
+        """ Test that no timer is started when more than one project starts with the name. """
+        output = self._run_command(['start', 'description', '-n', 'proj'])
+
+        self.assertIn('ERROR: "proj" matches more than one project: "Project 1", "Project 2", "Project 3".', output)
+        self.assertEqual(self._requests(), [])
+
+    def test_unknown_name(self) -> None:
+        """ Test that no timer is started for a name that matches no project. """
+        output = self._run_command(['start', 'description', '-n', 'zzz'])
+
+        self.assertIn('ERROR: There is no project named "zzz" in the "Workspace 1" workspace.', output)
+        self.assertEqual(self._requests(), [])
+
+    def test_projects_in_older_catalog(self) -> None:
+        """ Test that projects saved as JSON by an older version, with or without their index, are found. """
+        catalog_path = os.path.join(self.data_dir, 'catalog.json')
+        projects_path = os.path.join(self.data_dir, 'projects.bin')
+
+        with open(catalog_path) as f:
+            catalog = json.load(f)
+        catalog['PROJECTS'] = dict(ProjectCatalog(projects_path))
+        catalog['PROJECT_INDEX'] = {}
+        with open(catalog_path, 'w') as f:
+            json.dump(catalog, f)
+        os.unlink(projects_path)
+
+        self._run_command(['start', 'description', '-n', 'Project 3'])
+
+        self.assertEqual(self._started_project_id(), self.projects['Project 3'])
+        self.assertEqual(dict(ProjectCatalog(projects_path)), catalog['PROJECTS'])
+        with open(catalog_path) as f:
+            self.assertEqual(set(json.load(f)), {'WORKSPACES', 'SYNC'})
+
+if __name__ == '__main__':
+    unittest.main()
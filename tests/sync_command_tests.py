@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from tests.utils import FakeTogglTestCase
+from tests.fake_toggl import now
+
+
+class TestSyncCommand(FakeTogglTestCase):
+    def _query(self, sql: str) -> list:
+        connection = sqlite3.connect(os.path.join(self.data_dir, 'tgl.db'))
+        try:
+            return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def test_first_sync(self) -> None:
+        """ Test that the first sync downloads the workspaces, projects and time entries. """
+        self._run_command(['start', 'description'])
+        self._run_command(['stop'])
+
+        output = self._run_command(['sync'])
+
+        self.assertIn('Time entries synced to', output)
+        self.assertRegex(output, r'Workspaces:\s*2 changed, 0 deleted')
+        self.assertRegex(output, r'Projects:\s*6 changed, 0 deleted')
+        self.assertRegex(output, r'Time entries:\s*1 changed, 0 deleted')
+        self.assertEqual(self._query('SELECT description FROM time_entries'), [('description',)])
+
+    def test_first_sync_downloads_old_time_entries(self) -> None:
+        """ Test that the first sync gets the time entries older than the ones /me returns, and later syncs don't. """
+        start = (datetime.now(timezone.utc) - timedelta(days=200)).replace(microsecond=0).isoformat()
+        with self.server.state.lock:
+            self.server.state.add_time_entry(self.server.state.default_wid, 'old entry', start, 3600)
+
+        output = self._run_command(['sync'])
+
+        self.assertRegex(output, r'Time entries:\s*1 changed, 0 deleted')
+        self.assertEqual(self._query('SELECT description FROM time_entries'), [('old entry',)])
+        self.assertIn('GET /api/v8/time_entries', self._requests())
+
+        self.server.reset_stats()
+        self._run_command(['sync'])
+        self.assertEqual(self._requests(), ['GET /api/v8/me', 'GET /api/v8/time_entries'])
+        self.assertEqual(self._query('SELECT description FROM time_entries'), [('old entry',)])
+
+    def test_sync_gets_changes_to_older_time_entries(self) -> None:
+        """ Test that a later sync gets the changes to time entries older than the ones /me returns. """
+        start = (datetime.now(timezone.utc) - timedelta(days=20)).replace(microsecond=0).isoformat()
+        with self.server.state.lock:
+            changed = self.server.state.add_time_entry(self.server.state.default_wid, 'old', start, 3600)
+            deleted = self.server.state.add_time_entry(self.server.state.default_wid, 'deleted', start, 60)
+
+            # Last changed when it was tracked, so the edit below is always a newer change
+            changed['at'] = start
+
+        self._run_command(['sync'])
+
+        with self.server.state.lock:
+            changed['description'] = 'edited'
+            changed['at'] = now()
+            del self.server.state.time_entries[deleted['id']]
+
+        output = self._run_command(['sync'])
+
+        self.assertRegex(output, r'Time entries:\s*1 changed, 1 deleted')
+        self.assertEqual(self._query('SELECT description FROM time_entries'), [('edited',)])
+
+    def _age_account(self) -> None:
+        """ Move the changes made to the account so far out of the second the next sync overlaps with. """
+        with self.server.state.lock:
+            for o in list(self.server.state.workspaces.values()) + list(self.server.state.projects.values()):
+                o['at'] = '2020-01-01T00:00:00+00:00'
+
+    def test_sync_only_asks_for_changes(self) -> None:
+        """ Test that the next sync sends the time of the last one and applies deleted projects. """
+        self._age_account()
+        self._run_command(['sync'])
+        self._run_command(['delete', 'project'], '1\n')
+
+        output = self._run_command(['sync'])
+
+        self.assertRegex(output, r'Workspaces:\s*0 changed, 0 deleted')
+        self.assertRegex(output, r'Projects:\s*0 changed, 1 deleted')
+        self.assertEqual(self._query('SELECT COUNT(*) FROM projects'), [(5,)])
+
+    def test_change_in_the_second_of_the_sync(self) -> None:
+        """ Test that a time entry added in the same second as a sync is downloaded by the next one. """
+        self._run_command(['sync'])
+
+        start = datetime.fromtimestamp(self.server.last_since, timezone.utc).isoformat()
+        with self.server.state.lock:
+            entry = self.server.state.add_time_entry(self.server.state.default_wid, 'description', start, 60)
+            entry['at'] = start
+
+        self._run_command(['sync'])
+
+        self.assertEqual(self._query('SELECT description FROM time_entries'), [('description',)])
+
+    def test_full_sync(self) -> None:
+        """ Test that a full sync downloads everything again. """
+        self._run_command(['sync'])
+
+        output = self._run_command(['sync', '--full'])
+        self.assertRegex(output, r'Projects:\s*6 changed, 0 deleted')
+
+
+if __name__ == "__main__":
+    unittest.main()
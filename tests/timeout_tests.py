@@ -0,0 +1,38 @@
+import time
+import unittest
+
+from tests.utils import FakeTogglTestCase
+
+
+class TestTimeouts(FakeTogglTestCase):
+    def test_stalled_request_fails_fast(self) -> None:
+        """ Test that a command stops waiting for Toggl once its time budget runs out. """
+        self.server.latency = 5
+
+        start = time.perf_counter()
+        output = self._run_command(['--timeout', '0.5', 'current', '--refresh'])
+
+        self.assertLess(time.perf_counter() - start, 3)
+        self.assertIn('ERROR: Toggl did not answer in time. Use --timeout to wait longer.', output)
+
+    def test_current_falls_back_to_the_cached_timer(self) -> None:
+        """ Test that the last known timer is shown when Toggl does not answer in time. """
+        self._run_command(['start', 'description'])
+        self.server.latency = 5
+
+        output = self._run_command(['--timeout', '0.5', 'current', '--refresh'])
+
+        self.assertIn('WARNING: Toggl could not be reached, this is the last timer tgl knows about.', output)
+        self.assertIn('Description:  description', output)
+
+    def test_timeout_is_only_network_time(self) -> None:
+        """ Test that the budget is spent by slow requests, not by the command itself. """
+        self.server.latency = 0.3
+
+        output = self._run_command(['--timeout', '1', 'start', 'description', '--confirm'])
+
+        self.assertIn('Timer started.', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
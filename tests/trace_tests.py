@@ -0,0 +1,49 @@
+import os
+import json
+import pstats
+import unittest
+
+from tests.utils import FakeTogglTestCase
+
+
+class TestTrace(FakeTogglTestCase):
+    def test_trace_flag(self) -> None:
+        """ Test that --trace prints the phases and every request of the command. """
+        output = self._run_command(['--trace', 'start', 'description', '--confirm'])
+
+        self.assertIn('Timer started.', output)
+        self.assertIn('Trace:', output)
+        self.assertRegex(output, r'import \s*\d+\.\dms')
+        self.assertRegex(output, r'command \s*\d+\.\dms')
+        self.assertRegex(output, r'GET\s+/api/v8/time_entries/current\s+200\s+\d+\.\dms\s+0B sent\s+\d+B received\s+new connection')
+        self.assertRegex(output, r'POST\s+/api/v8/time_entries/start\s+200 .* reused connection')
+        self.assertRegex(output, r'2 requests, \d+\.\dms in total')
+
+    def test_trace_json(self) -> None:
+        """ Test that TGL_TRACE=json prints the trace as JSON with the URL templates of the requests. """
+        self._run_command(['start', 'description'])
+        self.env['TGL_TRACE'] = 'json'
+
+        output = self._run_command(['stop', '--refresh'])
+
+        trace = json.loads(output.strip().splitlines()[-1])
+        self.assertIn('command', [phase['name'] for phase in trace['phases']])
+        self.assertEqual(trace['request_count'], 2)
+        self.assertEqual(trace['requests'][1]['method'], 'PUT')
+        self.assertEqual(trace['requests'][1]['url'], '/api/v8/time_entries/{}/stop')
+        self.assertEqual(trace['requests'][1]['status'], 200)
+        self.assertTrue(trace['requests'][1]['reused_connection'])
+
+    def test_profile(self) -> None:
+        """ Test that TGL_PROFILE writes a cProfile dump of the command. """
+        path = os.path.join(self.data_dir, 'tgl.prof')
+        self.env['TGL_PROFILE'] = path
+
+        output = self._run_command(['current'])
+
+        self.assertIn('There is no timer currently running.', output)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,16 @@
 import os
+import shutil
+import tempfile
+import unittest
 import subprocess
 from signal import SIG_DFL
+from typing import List
 
 import pexpect
 from dotenv import load_dotenv
 
+from tests.fake_toggl import API_TOKEN, FakeTogglServer, TogglState, unthrottle
+
 load_dotenv()
 
 
@@ -62,3 +68,51 @@ def delete_project_with_name(project_name: str) -> None:
     cmd.wait()
 
     cmd.kill(SIG_DFL)
+
+
+class FakeTogglTestCase(unittest.TestCase):
+    """ Runs tgl against the fake Toggl API with its own data directory, already set up. """
+
+    workspace_count = 2
+    projects_per_workspace = 3
+
+    def setUp(self) -> None:
+        self.server = FakeTogglServer(state=TogglState(self.workspace_count, self.projects_per_workspace)).start()
+        self.data_dir = tempfile.mkdtemp()
+
+        self.env = dict(os.environ)
+        self.env.update({
+            'TGL_API_URL': self.server.url,
+            'TGL_DATA_DIR': self.data_dir,
+            # Keep the commands away from a tgl daemon that may be running
+            'XDG_RUNTIME_DIR': self.data_dir,
+        })
+
+        self._run_command(['setup', '-a'], API_TOKEN + '\n')
+        unthrottle(self.data_dir)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        shutil.rmtree(self.data_dir)
+        return super().tearDown()
+
+    def _run_command(self, args: List[str], user_input: str = '', offline: bool = False) -> str:
+        """ Run a tgl command and return its output. With `offline` the API can't be reached. """
+        env = dict(self.env)
+        if offline:
+            # Nothing listens on the discard port
+            env['TGL_API_URL'] = 'http://127.0.0.1:9'
+
+        self.server.reset_stats()
+        output = subprocess.run(
+            ['tgl'] + args,
+            input=user_input.encode('utf-8'),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=env
+        )
+        return output.stdout.decode('utf-8')
+
+    def _requests(self) -> List[str]:
+        return [f"{r['method']} {r['path']}" for r in self.server.stats['requests']]
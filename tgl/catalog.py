@@ -0,0 +1,209 @@
+import os
+import struct
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+# Binary file with the projects of every workspace. It is read with mmap, and only the
+# workspaces a command uses are decoded, so the cost of a command doesn't grow with the
+# size of the account.
+#
+#   header      magic, version, number of workspaces, number of projects
+#   workspaces  (workspace id, first project, number of projects), sorted by workspace id
+#   projects    (project id, name offset, name length), sorted by lowercase name in each workspace
+#   names       UTF-8 names, every different name stored once
+MAGIC = b'TGLP'
+VERSION = 1
+
+HEADER = struct.Struct('<4sIII')
+WORKSPACE = struct.Struct('<QII')
+PROJECT = struct.Struct('<QII')
+
+
+def get_sort_key(project: Tuple[str, str]) -> Tuple[str, str]:
+    """ Order of the (project id, name) pairs of a workspace, which find_prefix searches by name. """
+    project_id, name = project
+    return name.lower(), project_id
+
+
+class ProjectCatalog(MutableMapping):
+    """ {workspace id: {project id: name}} read from a catalog file one workspace at a time.
+
+    A workspace is decoded the first time it is accessed and kept in memory from then on, so
+    it can be changed in place like the dictionaries of the other config sections.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._buffer = None
+        self._file_workspaces: Dict[str, Tuple[int, int]] = {}
+        self._projects_offset = 0
+        self._names_offset = 0
+
+        self._decoded: Dict[str, Dict[str, str]] = {}
+        self._deleted: Set[str] = set()
+
+        if path is not None:
+            self._open(path)
+
+    def _open(self, path: str) -> None:
+        import mmap
+
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+
+            # The mapping stays valid after the file is closed. Windows doesn't allow replacing a
+            # file that is mapped, so it is released with close() before the catalog is written.
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, workspace_count, project_count = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a project catalog of this version of tgl")
+
+        # Only the small table of workspaces is read up front
+        for workspace_id, first, count in WORKSPACE.iter_unpack(
+                self._buffer[HEADER.size:HEADER.size + workspace_count * WORKSPACE.size]):
+            self._file_workspaces[str(workspace_id)] = (first, count)
+
+        self._projects_offset = HEADER.size + workspace_count * WORKSPACE.size
+        self._names_offset = self._projects_offset + project_count * PROJECT.size
+
+    def _decode(self, workspace_id: str) -> Dict[str, str]:
+        first, count = self._file_workspaces[workspace_id]
+        start = self._projects_offset + first * PROJECT.size
+
+        records = self._buffer[start:start + count * PROJECT.size]
+
+        projects = {}
+        for project_id, name_offset, name_length in PROJECT.iter_unpack(records):
+            name_start = self._names_offset + name_offset
+            projects[str(project_id)] = self._buffer[name_start:name_start + name_length].decode('utf-8')
+
+        return projects
+
+    def _read_project(self, position: int) -> Tuple[str, str]:
+        """ (project id, name) of the project record at `position` in the file. """
+        project_id, name_offset, name_length = PROJECT.unpack_from(
+            self._buffer, self._projects_offset + position * PROJECT.size)
+        name_start = self._names_offset + name_offset
+
+        return str(project_id), self._buffer[name_start:name_start + name_length].decode('utf-8')
+
+    def find_prefix(self, workspace_id: str, prefix: str) -> List[Tuple[str, str]]:
+        """ (project id, name) of the projects in the workspace whose lowercase name starts with `prefix`.
+
+        The projects are in name order. A workspace that hasn't been decoded is searched with
+        a binary search of its records, which only decodes the names it compares.
+        """
+        if workspace_id in self._decoded:
+            return sorted(
+                ((project_id, name) for project_id, name in self._decoded[workspace_id].items()
+                 if name.lower().startswith(prefix)),
+                key=get_sort_key
+            )
+
+        if not self._in_file(workspace_id):
+            return []
+
+        first, count = self._file_workspaces[workspace_id]
+        low, high = first, first + count
+        while low < high:
+            middle = (low + high) // 2
+
+            if self._read_project(middle)[1].lower() < prefix:
+                low = middle + 1
+            else:
+                high = middle
+
+        projects = []
+        for position in range(low, first + count):
+            project_id, name = self._read_project(position)
+
+            if not name.lower().startswith(prefix):
+                break
+
+            projects.append((project_id, name))
+
+        return projects
+
+    def _in_file(self, workspace_id: str) -> bool:
+        return workspace_id in self._file_workspaces and workspace_id not in self._deleted
+
+    def __getitem__(self, workspace_id: str) -> Dict[str, str]:
+        if workspace_id not in self._decoded:
+            if not self._in_file(workspace_id):
+                raise KeyError(workspace_id)
+
+            self._decoded[workspace_id] = self._decode(workspace_id)
+
+        return self._decoded[workspace_id]
+
+    def __setitem__(self, workspace_id: str, projects: Dict[str, str]) -> None:
+        self._decoded[workspace_id] = projects
+
+    def __delitem__(self, workspace_id: str) -> None:
+        if workspace_id not in self:
+            raise KeyError(workspace_id)
+
+        self._decoded.pop(workspace_id, None)
+        if workspace_id in self._file_workspaces:
+            self._deleted.add(workspace_id)
+
+    def __contains__(self, workspace_id: object) -> bool:
+        return workspace_id in self._decoded or self._in_file(workspace_id)
+
+    def __iter__(self) -> Iterator[str]:
+        for workspace_id in self._file_workspaces:
+            if workspace_id in self._decoded or workspace_id not in self._deleted:
+                yield workspace_id
+
+        for workspace_id in self._decoded:
+            if workspace_id not in self._file_workspaces:
+                yield workspace_id
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def close(self) -> None:
+        """ Decode the workspaces that are still only in the file and release the mapping. """
+        if self._buffer is None:
+            return
+
+        for workspace_id in list(self):
+            self[workspace_id]
+
+        self._buffer.close()
+        self._buffer = None
+        self._file_workspaces = {}
+        self._deleted = set()
+
+    def clear(self) -> None:
+        self._decoded.clear()
+        self._deleted.update(self._file_workspaces)
+
+
+def to_bytes(catalog: Mapping[str, Mapping[str, str]]) -> bytes:
+    """ Encode {workspace id: {project id: name}} in the catalog file format. """
+    workspace_records = bytearray()
+    project_records = bytearray()
+    names = bytearray()
+    name_positions: Dict[str, Tuple[int, int]] = {}
+
+    project_count = 0
+    workspace_ids = sorted(catalog, key=int)
+    for workspace_id in workspace_ids:
+        projects = sorted(catalog[workspace_id].items(), key=get_sort_key)
+
+        for project_id, name in projects:
+            position = name_positions.get(name)
+            if position is None:
+                encoded = name.encode('utf-8')
+                position = name_positions[name] = (len(names), len(encoded))
+                names += encoded
+
+            project_records += PROJECT.pack(int(project_id), *position)
+
+        workspace_records += WORKSPACE.pack(int(workspace_id), project_count, len(projects))
+        project_count += len(projects)
+
+    header = HEADER.pack(MAGIC, VERSION, len(workspace_ids), project_count)
+    return header + bytes(workspace_records) + bytes(project_records) + bytes(names)
@@ -0,0 +1,248 @@
+import re
+import os
+import time
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from tgl import trace
+
+if TYPE_CHECKING:
+    import requests
+
+# Every request goes to the same Toggl host, so a single pool is enough.
+# The pool size allows a few requests to be in flight at the same time.
+POOL_CONNECTIONS = 1
+POOL_MAXSIZE = 10
+
+TOGGL_API_HOST = 'https://api.track.toggl.com'
+
+# Responses that mean Toggl didn't handle the request and it can be sent again: too many
+# requests, and the errors of a server that is overloaded or restarting
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# A proxy answers 502 or 504 when it lost Toggl's answer, and Toggl may have handled the
+# request. Sending a POST again would create a second object, so it is only retried on the
+# responses that say the request was never handled.
+NON_IDEMPOTENT_RETRY_STATUS_CODES = (429, 503)
+NON_IDEMPOTENT_METHODS = ('POST',)
+
+# Retries wait a random time up to RETRY_BASE_DELAY * 2^attempt seconds, capped at RETRY_MAX_DELAY,
+# or as long as the Retry-After header asks. Once MAX_RETRY_TIME seconds are spent retrying,
+# the last response is returned.
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+MAX_RETRY_TIME = 30.0
+
+# Seconds to wait for a connection and then for every read of the response. Both are cut
+# down to what is left of the command's time budget.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+
+# Seconds of network time a command has for all its requests when SETTINGS.TIMEOUT and
+# --timeout are not set
+DEFAULT_TIME_BUDGET = 20.0
+
+
+class NetworkError(Exception):
+    """ Toggl could not be reached, raised instead of the requests connection errors. """
+
+
+class RequestTimeout(NetworkError):
+    """ Toggl didn't answer within the time the command had left for its requests. """
+
+
+class TogglClient:
+    def __init__(self) -> None:
+        # requests is only imported once a command needs the network, since importing it
+        # is the slowest part of starting tgl
+        with trace.phase('import requests'):
+            import requests
+            from requests.adapters import HTTPAdapter
+
+        self._timeout_errors = requests.Timeout
+        self._connection_errors = requests.ConnectionError
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # TGL_API_URL sends the requests to another server, like the fake Toggl server in tests/
+        self.api_url = os.environ.get('TGL_API_URL', '').rstrip('/')
+
+        # Every request, from this process or any other tgl process, takes a token first
+        from tgl.ratelimit import get_toggl_bucket
+        self.bucket = get_toggl_bucket()
+
+        # Seconds left of the command's time budget, None when there is no limit
+        import threading
+
+        self.time_left = _time_budget
+        self._time_lock = threading.Lock()
+
+        # Connections opened by every pool, to tell which requests reused one for the trace
+        self._pool_connections = {}
+
+    def request(self, method: str, url: str, **kwargs) -> 'requests.Response':
+        if self.api_url and url.startswith(TOGGL_API_HOST):
+            url = self.api_url + url[len(TOGGL_API_HOST):]
+
+        started = time.monotonic()
+        try:
+            return self._send(method, url, started, **kwargs)
+        finally:
+            if self.time_left is not None:
+                with self._time_lock:
+                    self.time_left -= time.monotonic() - started
+
+    def _send(self, method: str, url: str, started: float, **kwargs) -> 'requests.Response':
+        retry_time = MAX_RETRY_TIME if self.time_left is None else min(MAX_RETRY_TIME, self.time_left)
+        retry_until = started + retry_time
+        attempt = 0
+
+        retry_status_codes = RETRY_STATUS_CODES
+        if method in NON_IDEMPOTENT_METHODS:
+            retry_status_codes = NON_IDEMPOTENT_RETRY_STATUS_CODES
+
+        while True:
+            if trace.enabled:
+                response = self._traced_request(method, url, timeout=self._get_timeouts(started), **kwargs)
+            else:
+                self.bucket.acquire()
+                response = self._request_once(method, url, timeout=self._get_timeouts(started), **kwargs)
+
+            if response.status_code not in retry_status_codes:
+                return response
+
+            delay = get_retry_delay(response, attempt)
+            if time.monotonic() + delay > retry_until:
+                return response
+
+            time.sleep(delay)
+            attempt += 1
+
+    def _request_once(self, method: str, url: str, **kwargs) -> 'requests.Response':
+        try:
+            return self.session.request(method, url, **kwargs)
+        except self._timeout_errors as e:
+            raise RequestTimeout(str(e)) from e
+        except self._connection_errors as e:
+            raise NetworkError(str(e)) from e
+
+    def _traced_request(self, method: str, url: str, **kwargs) -> 'requests.Response':
+        queued = time.perf_counter()
+        self.bucket.acquire()
+
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self._request_once(method, url, **kwargs)
+            return response
+        finally:
+            trace.record_request(
+                method=method,
+                url_template=get_url_template(url),
+                status=None if response is None else response.status_code,
+                seconds=time.perf_counter() - started,
+                rate_limit_seconds=started - queued,
+                bytes_sent=0 if response is None else get_body_size(response.request.body),
+                bytes_received=0 if response is None else len(response.content),
+                reused_connection=response is not None and self._reused_connection(response)
+            )
+
+    def _reused_connection(self, response: 'requests.Response') -> bool:
+        # The connection was reused if its pool didn't have to open a new one for the request
+        pool = response.raw._pool
+        reused = pool.num_connections == self._pool_connections.get(id(pool), 0)
+        self._pool_connections[id(pool)] = pool.num_connections
+
+        return reused
+
+    def _get_timeouts(self, started: float) -> Tuple[float, float]:
+        """ Connect and read timeouts for the next try of a request that started at `started`. """
+        if self.time_left is None:
+            return CONNECT_TIMEOUT, READ_TIMEOUT
+
+        left = self.time_left - (time.monotonic() - started)
+        if left <= 0:
+            raise RequestTimeout("The time for the requests of the command ran out.")
+
+        return min(CONNECT_TIMEOUT, left), min(READ_TIMEOUT, left)
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request('DELETE', url, **kwargs)
+
+
+def get_body_size(body) -> int:
+    if body is None:
+        return 0
+
+    return len(body.encode('utf-8') if isinstance(body, str) else body)
+
+
+def get_url_template(url: str) -> str:
+    """ Path of the URL with the ids replaced by {}, like the URIs in the config file. """
+    path = re.sub(r'^https?://[^/]+', '', url)
+    return re.sub(r'/\d+(?=/|$)', '/{}', path)
+
+
+def get_retry_delay(response: 'requests.Response', attempt: int) -> float:
+    """ Seconds to wait before sending the request again, exponential backoff with full jitter. """
+    import random
+
+    backoff = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+    if retry_after is None:
+        return backoff
+
+    return max(retry_after, backoff)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """ Seconds in a Retry-After header, which is either a number of seconds or an HTTP date. """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_client = None
+_time_budget: Optional[float] = None
+
+
+def set_time_budget(seconds: Optional[float]) -> None:
+    """ Give the requests from now on `seconds` of network time in total, or no limit with None. """
+    global _time_budget
+    _time_budget = seconds
+
+    if _client is not None:
+        _client.time_left = seconds
+
+
+def get_client() -> TogglClient:
+    """ Return the client shared by every API call so the connection is reused. """
+    global _client
+
+    if _client is None:
+        _client = TogglClient()
+
+    return _client
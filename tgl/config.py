@@ -0,0 +1,234 @@
+import os
+import json
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Set
+
+from tgl import trace
+
+package_data_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+
+# Sections that change often or grow with the account are kept in their own files, so a command
+# only reads and writes the files of the sections it uses. The settings and the API endpoints
+# stay in config.json, and the projects are in the binary format of tgl.catalog.
+CONFIG_FILE = 'config.json'
+CREDENTIALS_FILE = 'credentials.json'
+CATALOG_FILE = 'catalog.json'
+PROJECTS_FILE = 'projects.bin'
+STATE_FILE = 'state.json'
+
+SECTION_FILES = {
+    'DEFAULTS': CREDENTIALS_FILE,
+    'WORKSPACES': CATALOG_FILE,
+    'SYNC': CATALOG_FILE,
+    'PROJECTS': PROJECTS_FILE,
+    'PREVIOUS_TIMER': STATE_FILE,
+    'CURRENT_TIMER': STATE_FILE,
+}
+
+# Sections older versions of tgl saved that are not needed anymore. The project index is
+# the order of the projects in the catalog.
+OBSOLETE_SECTIONS = ('PROJECT_INDEX',)
+
+default_config_file_path = os.path.join(package_data_dir, CONFIG_FILE)
+
+# TGL_DATA_DIR keeps the account data somewhere else, e.g. when running against a test server
+data_dir = os.environ.get('TGL_DATA_DIR', package_data_dir)
+config_file_path = os.path.join(data_dir, CONFIG_FILE)
+credentials_file_path = os.path.join(data_dir, CREDENTIALS_FILE)
+
+
+class ConfigStore:
+    """ Single in-memory copy of the config files shared by every module.
+
+    Each file is only read the first time one of its sections is accessed. Changes are saved
+    with `save()`, which only writes the files of the changed sections, and inside `batch()`
+    all the saves are written to disk once at the end.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._files: Dict[str, dict] = {}
+        self._mtimes: Dict[str, Optional[int]] = {}
+        self._dirty: Set[str] = set()
+        self._batch_depth = 0
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.directory, file_name)
+
+    def _load(self, section: str) -> dict:
+        return self._load_file(SECTION_FILES.get(section, CONFIG_FILE))
+
+    def _load_file(self, file_name: str) -> dict:
+        if file_name not in self._files:
+            # Data directories of older versions of tgl have the section in another file
+            if file_name != CONFIG_FILE and not os.path.exists(self._path(file_name)):
+                self._move_sections(file_name)
+
+            if file_name not in self._files:
+                with trace.phase(f'load {file_name}'):
+                    self._files[file_name] = self._read(file_name)
+
+        return self._files[file_name]
+
+    def _read(self, file_name: str) -> dict:
+        path = self._path(file_name)
+
+        if file_name == CONFIG_FILE:
+            # A new data directory starts from the config file shipped with tgl
+            if not os.path.exists(path):
+                path = default_config_file_path
+        elif file_name == PROJECTS_FILE:
+            from tgl.catalog import ProjectCatalog
+
+            exists = os.path.exists(path)
+            self._mtimes[file_name] = os.stat(path).st_mtime_ns if exists else None
+            return {'PROJECTS': ProjectCatalog(path if exists else None)}
+        elif not os.path.exists(path):
+            self._mtimes[file_name] = None
+            return {section: {} for section, name in SECTION_FILES.items() if name == file_name}
+
+        with open(path, 'r') as f:
+            self._mtimes[file_name] = os.fstat(f.fileno()).st_mtime_ns
+            data = json.load(f)
+
+        if file_name == CONFIG_FILE and path != default_config_file_path:
+            self._add_defaults(data)
+
+        for section, name in SECTION_FILES.items():
+            if name == file_name:
+                data.setdefault(section, {})
+
+        return data
+
+    @staticmethod
+    def _add_defaults(data: dict) -> None:
+        """ Fill in what a config file in another data directory is missing from the shipped one. """
+        with open(default_config_file_path, 'r') as f:
+            defaults = json.load(f)
+
+        # The API endpoints always come from the installed version of tgl
+        data['URI'] = defaults['URI']
+
+        for section, value in defaults.items():
+            data.setdefault(section, value)
+
+    def _move_sections(self, file_name: str) -> None:
+        """ Move the sections that older versions of tgl saved in config.json or catalog.json to their files. """
+        # Only the projects were ever saved in catalog.json, so the other files don't need to read it
+        sources = [CONFIG_FILE]
+        if file_name == PROJECTS_FILE and os.path.exists(self._path(CATALOG_FILE)):
+            sources.append(CATALOG_FILE)
+
+        for source in sources:
+            source_data = self._load_file(source)
+            moved = {
+                section: source_data.pop(section) for section in list(source_data)
+                if SECTION_FILES.get(section, CONFIG_FILE) != source or section in OBSOLETE_SECTIONS
+            }
+
+            if len(moved) == 0:
+                continue
+
+            for target in set(SECTION_FILES[section] for section in moved if section in SECTION_FILES):
+                # A file that already exists is newer than the copy that was moved
+                if os.path.exists(self._path(target)):
+                    continue
+
+                # The sections are filled in place so that the projects stay in a ProjectCatalog
+                self._files[target] = self._read(target)
+                for section, value in moved.items():
+                    if SECTION_FILES.get(section) == target:
+                        self._files[target][section].update(value)
+                self._write(target)
+
+            self._write(source)
+
+    def reload_if_changed(self) -> None:
+        """ Drop the loaded files that another process changed since they were read. """
+        dirty_files = {SECTION_FILES.get(section, CONFIG_FILE) for section in self._dirty}
+
+        for file_name in list(self._files):
+            if file_name in dirty_files:
+                continue
+
+            try:
+                mtime = os.stat(self._path(file_name)).st_mtime_ns
+            except OSError:
+                mtime = None
+
+            if mtime != self._mtimes.get(file_name):
+                del self._files[file_name]
+
+    def __getitem__(self, section: str) -> Any:
+        return self._load(section)[section]
+
+    def __setitem__(self, section: str, value: Any) -> None:
+        self._load(section)[section] = value
+        self._dirty.add(section)
+
+    def __contains__(self, section: str) -> bool:
+        return section in self._load(section)
+
+    def get(self, section: str, default: Any = None) -> Any:
+        return self._load(section).get(section, default)
+
+    def save(self, *sections: str) -> None:
+        """ Mark the sections as changed and write their files unless a batch is open. """
+        self._dirty.update(sections)
+
+        if self._batch_depth == 0:
+            self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+
+    def flush(self) -> None:
+        dirty_files = {SECTION_FILES.get(section, CONFIG_FILE) for section in self._dirty}
+
+        for file_name in sorted(dirty_files):
+            if file_name in self._files:
+                with trace.phase(f'save {file_name}'):
+                    self._write(file_name)
+
+        self._dirty.clear()
+
+    def _write(self, file_name: str) -> None:
+        import tempfile
+
+        path = self._path(file_name)
+
+        # Write to a temporary file first so that the file is never left half written
+        name, extension = os.path.splitext(file_name)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=f'.{name}-', suffix=extension, dir=self.directory)
+        try:
+            if file_name == PROJECTS_FILE:
+                from tgl.catalog import to_bytes
+
+                catalog = self._files[file_name]['PROJECTS']
+                data = to_bytes(catalog)
+
+                # The old file can't be replaced while it is mapped on Windows
+                catalog.close()
+
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+            else:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self._files[file_name], f, indent=4)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        self._mtimes[file_name] = os.stat(path).st_mtime_ns
+
+
+config = ConfigStore(data_dir)
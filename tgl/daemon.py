@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+from argparse import Namespace
+from typing import List, Optional
+
+from tgl.config import config
+
+# Commands that the daemon can run for the CLI. Anything that asks the user for input
+# has to run in the user's terminal, so it is never forwarded.
+DAEMON_COMMANDS = ('start', 'stop', 'current', 'pause', 'resume')
+
+
+def get_socket_dir() -> str:
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or os.environ.get('TMPDIR') or '/tmp'
+
+    # TMPDIR and /tmp are shared with every user, so the socket is kept in a directory
+    # that only its owner can use
+    return os.path.join(runtime_dir, f'tgl-{os.getuid()}')
+
+
+def get_socket_path() -> str:
+    return os.path.join(get_socket_dir(), 'daemon.sock')
+
+
+def _is_private(path: str, directory: bool = False) -> bool:
+    """ Check that `path` is owned by this user and, for the socket directory, that nobody else can use it.
+
+    Otherwise another user could have created it to pose as the daemon.
+    """
+    import stat
+
+    try:
+        path_stat = os.lstat(path)
+    except OSError:
+        return False
+
+    if path_stat.st_uid != os.getuid():
+        return False
+
+    if directory:
+        return stat.S_ISDIR(path_stat.st_mode) and path_stat.st_mode & 0o077 == 0
+
+    return stat.S_ISSOCK(path_stat.st_mode)
+
+
+def is_supported() -> bool:
+    # Unix domain sockets and socketserver.UnixStreamServer are only available on POSIX
+    return os.name == 'posix'
+
+
+def should_forward(args: Namespace) -> bool:
+    if not is_supported() or args.command not in DAEMON_COMMANDS:
+        return False
+
+    # Selecting a project or workspace and confirming a stop are interactive.
+    # A project given by name is looked up without asking.
+    if args.command == 'start' and (args.project or args.workspace or args.confirm):
+        return False
+
+    return True
+
+
+def _send(message: dict) -> Optional[dict]:
+    """ Send a message to the daemon and return its reply, or None if no daemon is running. """
+    socket_path = get_socket_path()
+
+    # A socket someone else made is never used, the command runs without the daemon instead
+    if not _is_private(get_socket_dir(), directory=True) or not _is_private(socket_path):
+        return None
+
+    # Only imported when a daemon is running so that checking for one stays cheap
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return None
+
+        # Once the daemon has the message the command may already have run,
+        # so errors from here on can't fall back to running it again
+        try:
+            sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as f:
+                return json.loads(f.readline().decode('utf-8'))
+        except (OSError, ValueError):
+            sys.exit("ERROR: Lost the connection to the tgl daemon.")
+    finally:
+        sock.close()
+
+
+def forward(argv: List[str]) -> Optional[int]:
+    """ Run the command in the daemon and return its exit code, or None if no daemon is running. """
+    response = _send({'argv': list(argv)})
+
+    if response is None:
+        return None
+
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+
+    return response['code']
+
+
+def run_command(argv: List[str]) -> dict:
+    import io
+    import traceback
+    from contextlib import redirect_stdout, redirect_stderr
+
+    from tgl import main
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    code = 0
+
+    # Pick up changes made by commands that ran outside of the daemon, like `tgl setup`
+    config.reload_if_changed()
+
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            parser = main.create_parser()
+            args = parser.parse_args(argv)
+            main.run_command(parser, args)
+        except SystemExit as e:
+            # Same exit codes and messages as the interpreter would give
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+
+    return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'code': code}
+
+
+def serve() -> None:
+    import signal
+    import socketserver
+
+    class DaemonRequestHandler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+
+            if request.get('stop'):
+                self.server.stopping = True
+                response = {'stopped': True}
+            elif request.get('status'):
+                response = {'pid': os.getpid()}
+            else:
+                self.server.busy = True
+                try:
+                    response = run_command(request['argv'])
+                finally:
+                    self.server.busy = False
+
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+    socket_dir = get_socket_dir()
+    socket_path = get_socket_path()
+
+    os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    if not _is_private(socket_dir, directory=True):
+        sys.exit(f"ERROR: {socket_dir} has to be a directory that only you can use to start the tgl daemon.")
+
+    if _send({'status': True}) is not None:
+        sys.exit("The tgl daemon is already running.")
+
+    # Remove the socket left behind by a daemon that didn't shut down cleanly
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    # The server handles one command at a time since every command shares the
+    # process-wide stdout, config and HTTP session
+    server = socketserver.UnixStreamServer(socket_path, DaemonRequestHandler)
+    server.stopping = False
+    server.busy = False
+    os.chmod(socket_path, 0o600)
+
+    def shut_down(signum, frame) -> None:
+        server.stopping = True
+
+        # A running command is let finish so that its changes are saved. Between commands
+        # the server waits for a connection, which only an exception interrupts.
+        if not server.busy:
+            sys.exit(0)
+
+    for signal_number in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signal_number, shut_down)
+
+    print(f"tgl daemon listening on {socket_path}")
+    sys.stdout.flush()
+
+    try:
+        while not server.stopping:
+            server.handle_request()
+    finally:
+        # Every command saves its changes when it finishes, this only covers one that was cut short
+        config.flush()
+        server.server_close()
+        os.unlink(socket_path)
+
+    print("tgl daemon stopped.")
+
+
+def stop() -> None:
+    if _send({'stop': True}) is None:
+        sys.exit("The tgl daemon is not running.")
+
+    print("tgl daemon stopped.")
+
+
+def status() -> None:
+    response = _send({'status': True})
+
+    if response is None:
+        sys.exit("The tgl daemon is not running.")
+
+    print(f"tgl daemon is running (pid {response['pid']}).")
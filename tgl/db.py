@@ -0,0 +1,240 @@
+import os
+import sys
+import json
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Iterator, List, Set, Tuple
+
+from tgl.client import get_client
+from tgl.config import config, data_dir
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# Local copy of the account's time entries, projects and workspaces
+database_file_path = os.path.join(data_dir, 'tgl.db')
+
+# /me only returns the time entries of the last 9 days, so the first sync and a full sync
+# ask for the older ones BACKFILL_WINDOW_DAYS at a time, going back until BACKFILL_EMPTY_WINDOWS
+# windows in a row have no time entries
+BACKFILL_WINDOW_DAYS = 30
+BACKFILL_EMPTY_WINDOWS = 12
+
+# /me only returns the changes to the time entries of the last 9 days, even with `since`, so
+# later syncs also compare the time entries of the last RECENT_WINDOW_DAYS days by date.
+# Changes to older time entries are only downloaded by a full sync.
+RECENT_WINDOW_DAYS = 30
+
+# Most time entries /time_entries returns for one request. A window that gets that many is split.
+TIME_ENTRIES_LIMIT = 1000
+
+TIME_ENTRY_COLUMNS = ['id', 'wid', 'pid', 'description', 'start', 'stop', 'duration', 'billable', 'tags', 'at']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workspaces (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    wid INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1,
+    at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS time_entries (
+    id INTEGER PRIMARY KEY,
+    wid INTEGER NOT NULL,
+    pid INTEGER,
+    description TEXT NOT NULL DEFAULT '',
+    start TEXT NOT NULL,
+    stop TEXT,
+    duration INTEGER NOT NULL,
+    billable INTEGER NOT NULL DEFAULT 0,
+    tags TEXT NOT NULL DEFAULT '[]',
+    at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS projects_wid ON projects (wid);
+CREATE INDEX IF NOT EXISTS time_entries_start ON time_entries (start);
+CREATE INDEX IF NOT EXISTS time_entries_pid_start ON time_entries (pid, start);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def connect() -> 'sqlite3.Connection':
+    import sqlite3
+
+    os.makedirs(os.path.dirname(database_file_path), exist_ok=True)
+
+    connection = sqlite3.connect(database_file_path)
+    connection.executescript(SCHEMA)
+
+    return connection
+
+
+def _get_sync_watermark(connection: 'sqlite3.Connection') -> str:
+    row = connection.execute("SELECT value FROM sync_state WHERE key = 'since'").fetchone()
+    return '' if row is None else row[0]
+
+
+def _apply_changes(connection: 'sqlite3.Connection', table: str, columns: List[str],
+                   objects: List[dict]) -> Tuple[int, int]:
+    """ Upsert the changed objects into `table` and remove the deleted ones. """
+    deleted_ids = [(o['id'],) for o in objects if o.get('server_deleted_at')]
+    changed_rows = [
+        tuple(_column_value(o, column) for column in columns)
+        for o in objects if not o.get('server_deleted_at')
+    ]
+
+    placeholders = ', '.join('?' for _ in columns)
+    connection.executemany(
+        f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+        changed_rows
+    )
+    connection.executemany(f"DELETE FROM {table} WHERE id = ?", deleted_ids)
+
+    return len(changed_rows), len(deleted_ids)
+
+
+def _column_value(toggl_object: dict, column: str):
+    value = toggl_object.get(column)
+
+    if column == 'tags':
+        return json.dumps(value or [])
+    if column in ('billable', 'active'):
+        # Projects are active and time entries are not billable unless Toggl says otherwise
+        default = column == 'active'
+        return int(default if value is None else value)
+    if column == 'description':
+        return value or ''
+
+    return value
+
+
+def _get_time_entries(authentication: Tuple[str, str], start: datetime, end: datetime) -> List[dict]:
+    """ Return the time entries that started from `start` up to `end`. """
+    params = {'start_date': start.isoformat(), 'end_date': end.isoformat()}
+    response = get_client().get(config['URI']['TIME_ENTRIES'], params=params, auth=authentication)
+
+    if response.status_code != 200:
+        sys.exit(f"ERROR: Time entries could not be synced. Response: {response.status_code}")
+
+    time_entries = response.json() or []
+
+    if len(time_entries) >= TIME_ENTRIES_LIMIT and end - start > timedelta(hours=1):
+        middle = start + (end - start) / 2
+        return _get_time_entries(authentication, start, middle) + _get_time_entries(authentication, middle, end)
+
+    return time_entries
+
+
+def _get_all_time_entries(authentication: Tuple[str, str]) -> Iterator[List[dict]]:
+    """ Yield the time entries of the account one window at a time, newest first. """
+    end = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    empty_windows = 0
+
+    while empty_windows < BACKFILL_EMPTY_WINDOWS:
+        start = end - timedelta(days=BACKFILL_WINDOW_DAYS)
+        time_entries = _get_time_entries(authentication, start, end)
+
+        if len(time_entries) > 0:
+            empty_windows = 0
+            yield time_entries
+        else:
+            empty_windows += 1
+
+        end = start
+
+
+def _sync_recent_time_entries(connection: 'sqlite3.Connection',
+                              authentication: Tuple[str, str]) -> Tuple[Set[int], Set[int]]:
+    """ Bring the time entries of the last RECENT_WINDOW_DAYS days up to date.
+
+    Returns the ids of the time entries that changed and of the ones that are gone from Toggl.
+    """
+    end = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    start = end - timedelta(days=RECENT_WINDOW_DAYS)
+    time_entries = _get_time_entries(authentication, start, end)
+
+    # Only the time entries whose last change isn't the one stored are written
+    stored = dict(connection.execute("SELECT id, at FROM time_entries WHERE start >= ?", (start.isoformat(),)))
+    changed = [t for t in time_entries if t['id'] not in stored or stored[t['id']] != t.get('at')]
+    _apply_changes(connection, 'time_entries', TIME_ENTRY_COLUMNS, changed)
+
+    returned_ids = {t['id'] for t in time_entries}
+    gone_ids = {time_entry_id for time_entry_id in stored if time_entry_id not in returned_ids}
+    connection.executemany("DELETE FROM time_entries WHERE id = ?", [(i,) for i in gone_ids])
+
+    return {t['id'] for t in changed}, gone_ids
+
+
+def sync(authentication: Tuple[str, str], full: bool = False) -> Dict[str, Tuple[int, int]]:
+    """ Download what changed since the last sync into the local database, or everything the first time.
+
+    Returns the number of (changed, deleted) objects for every table.
+    """
+    connection = connect()
+
+    try:
+        since = '' if full else _get_sync_watermark(connection)
+
+        params = {'with_related_data': 'true'}
+        if since:
+            params['since'] = since
+
+        response = get_client().get(config['URI']['USER_INFO'], params=params, auth=authentication)
+
+        if response.status_code != 200:
+            sys.exit(f"ERROR: Time entries could not be synced. Response: {response.status_code}")
+
+        response_json = response.json()
+        data = response_json['data']
+
+        with connection:
+            time_entries = data.get('time_entries') or []
+            if not since:
+                # Also drops the time entries that were deleted in Toggl while nothing was synced
+                connection.execute("DELETE FROM time_entries")
+
+            _apply_changes(connection, 'time_entries', TIME_ENTRY_COLUMNS, time_entries)
+            synced_ids = {t['id'] for t in time_entries if not t.get('server_deleted_at')}
+            deleted_ids = {t['id'] for t in time_entries if t.get('server_deleted_at')}
+
+            # /me only has the changes to the time entries of the last 9 days. The first sync
+            # and a full sync download every older time entry by date, later syncs only the
+            # ones of the last RECENT_WINDOW_DAYS days.
+            if not since:
+                for time_entries in _get_all_time_entries(authentication):
+                    _apply_changes(connection, 'time_entries', TIME_ENTRY_COLUMNS, time_entries)
+                    synced_ids.update(time_entry['id'] for time_entry in time_entries)
+            else:
+                changed_ids, gone_ids = _sync_recent_time_entries(connection, authentication)
+                synced_ids.update(changed_ids)
+                deleted_ids.update(gone_ids)
+
+            counts = {
+                'workspaces': _apply_changes(connection, 'workspaces', ['id', 'name', 'at'],
+                                             data.get('workspaces') or []),
+                'projects': _apply_changes(connection, 'projects', ['id', 'wid', 'name', 'active', 'at'],
+                                           data.get('projects') or []),
+                'time_entries': (len(synced_ids), len(deleted_ids)),
+            }
+
+            # The next sync continues from the server's time of this response. Like the reconfig
+            # in utils.set_sync_since, it starts a second earlier so that a change made in the
+            # same second isn't missed.
+            connection.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('since', ?)",
+                (str(response_json['since'] - 1),)
+            )
+    finally:
+        connection.close()
+
+    return counts
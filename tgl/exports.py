@@ -0,0 +1,69 @@
+import json
+from typing import TYPE_CHECKING, Iterator, List, TextIO, Tuple
+
+from tgl import reports
+
+if TYPE_CHECKING:
+    from datetime import date
+
+FORMATS = ('csv', 'jsonl')
+
+COLUMNS = ['id', 'workspace_id', 'project_id', 'project', 'description',
+           'start', 'stop', 'duration', 'billable', 'tags']
+
+
+def iter_rows(authentication: Tuple[str, str], workspace_ids: List[str],
+              since: 'date', until: 'date') -> Iterator[dict]:
+    """ Yield a row for every time entry in the range, reading one page of the report at a time. """
+    for workspace_id in workspace_ids:
+        for entries in reports.get_time_entry_pages(authentication, workspace_id, since, until):
+            for entry in entries:
+                yield {
+                    'id': entry['id'],
+                    'workspace_id': int(workspace_id),
+                    'project_id': entry['pid'],
+                    'project': entry['project'],
+                    'description': entry['description'],
+                    'start': entry['start'],
+                    'stop': entry['end'],
+                    'duration': (entry['dur'] or 0) // 1000,
+                    'billable': entry['is_billable'],
+                    'tags': entry['tags'] or [],
+                }
+
+
+def write_csv(rows: Iterator[dict], output: TextIO) -> int:
+    import csv
+
+    writer = csv.DictWriter(output, fieldnames=COLUMNS)
+    writer.writeheader()
+
+    count = 0
+    for row in rows:
+        writer.writerow(dict(row, tags=','.join(row['tags'])))
+        count += 1
+
+    return count
+
+
+def write_jsonl(rows: Iterator[dict], output: TextIO) -> int:
+    count = 0
+    for row in rows:
+        output.write(json.dumps(row) + '\n')
+        count += 1
+
+    return count
+
+
+def export(authentication: Tuple[str, str], workspace_ids: List[str], since: 'date', until: 'date',
+           output: TextIO, output_format: str = 'csv') -> int:
+    """ Stream the time entries in the range to `output` and return how many were written.
+
+    The rows are written as the pages arrive, so only one page is ever held in memory.
+    """
+    rows = iter_rows(authentication, workspace_ids, since, until)
+
+    if output_format == 'jsonl':
+        return write_jsonl(rows, output)
+
+    return write_csv(rows, output)
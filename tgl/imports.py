@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+from typing import Dict, Iterator, Set, Tuple
+
+from tgl import utils
+from tgl.client import get_client, NetworkError
+from tgl.config import config
+
+FORMATS = ('csv', 'jsonl')
+
+# Rows waiting for a worker at the same time, so a large file is never read into memory at once
+MAX_PENDING_ROWS = utils.MAX_CONCURRENT_REQUESTS * 4
+
+
+def get_checkpoint_path(path: str) -> str:
+    return path + '.checkpoint'
+
+
+def guess_format(path: str) -> str:
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(path: str, input_format: str) -> Iterator[dict]:
+    with open(path, 'r', newline='') as f:
+        if input_format == 'jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            import csv
+
+            for row in csv.DictReader(f):
+                yield row
+
+
+def read_checkpoint(path: str) -> Set[int]:
+    """ Return the numbers of the rows that an earlier import already created. """
+    try:
+        with open(path, 'r') as f:
+            return {int(line) for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def to_time_entry(row: dict) -> dict:
+    """ Build the time entry of a row, raising ValueError if the row can't be imported. """
+    project_id = str(row.get('project_id') or '')
+    workspace_id = str(row.get('workspace_id') or '')
+
+    # Without a workspace, the project's workspace or the default one is used
+    if not workspace_id:
+        workspace_id = next(
+            (wid for wid, projects in config['PROJECTS'].items() if project_id in projects),
+            config['DEFAULTS']['WID']
+        )
+
+    if workspace_id not in config['WORKSPACES']:
+        raise ValueError(f"workspace {workspace_id} is not in the config file")
+
+    if project_id and project_id not in config['PROJECTS'].get(workspace_id, {}):
+        raise ValueError(f"project {project_id} is not in workspace {workspace_id} in the config file")
+
+    if not row.get('start'):
+        raise ValueError("the start time is missing")
+
+    try:
+        start = utils.parse_time(row['start'])
+        stop = utils.parse_time(row['stop']) if row.get('stop') else None
+    except ValueError:
+        raise ValueError("the start and stop times have to look like 2021-03-01T09:00:00+00:00")
+
+    if row.get('duration') not in (None, ''):
+        try:
+            duration = int(row['duration'])
+        except ValueError:
+            raise ValueError(f"the duration '{row['duration']}' is not a number of seconds")
+    elif stop is not None:
+        duration = int((stop - start).total_seconds())
+    else:
+        raise ValueError("the duration or the stop time is needed")
+
+    if duration < 0:
+        raise ValueError("the time entry ends before it starts")
+
+    tags = row.get('tags') or []
+    if isinstance(tags, str):
+        tags = [tag for tag in tags.split(',') if tag]
+
+    billable = row.get('billable')
+    if isinstance(billable, str):
+        billable = billable.lower() in ('true', '1', 'yes')
+
+    time_entry = {
+        'description': row.get('description') or '',
+        'wid': int(workspace_id),
+        'start': row['start'],
+        'duration': duration,
+        'tags': tags,
+        'billable': bool(billable),
+        'created_with': 'tgl',
+    }
+
+    if project_id:
+        time_entry['pid'] = int(project_id)
+
+    return time_entry
+
+
+def create_time_entry(authentication: Tuple[str, str], time_entry: dict) -> int:
+    header = {"Content-Type": "application/json", }
+
+    response = get_client().post(
+        config['URI']['TIME_ENTRIES'],
+        headers=header,
+        data=json.dumps({'time_entry': time_entry}),
+        auth=authentication
+    )
+
+    return response.status_code
+
+
+def import_time_entries(authentication: Tuple[str, str], path: str, input_format: str) -> Dict[str, int]:
+    """ Create a completed time entry for every row of the file and return how the rows went.
+
+    The rows are sent by a few workers, at the rate the client's rate limiter allows. Every row that is created is
+    written to a checkpoint file, so running the import again after a failure only sends the
+    rows that are left.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    checkpoint_path = get_checkpoint_path(path)
+    done = read_checkpoint(checkpoint_path)
+
+    counts = {'imported': 0, 'already_imported': 0, 'invalid': 0, 'failed': 0}
+    pending = {}
+    offline = False
+
+    def collect(finished) -> None:
+        nonlocal offline
+
+        for future in finished:
+            number = pending.pop(future)
+
+            try:
+                status_code = future.result()
+            except NetworkError:
+                offline = True
+                continue
+
+            if status_code == 200:
+                checkpoint.write(f"{number}\n")
+                checkpoint.flush()
+                counts['imported'] += 1
+            else:
+                print(f"Row {number} could not be imported. Response: {status_code}", file=sys.stderr)
+                counts['failed'] += 1
+
+    with open(checkpoint_path, 'a') as checkpoint, \
+            ThreadPoolExecutor(max_workers=utils.MAX_CONCURRENT_REQUESTS) as executor:
+        for number, row in enumerate(read_rows(path, input_format), 1):
+            if number in done:
+                counts['already_imported'] += 1
+                continue
+
+            try:
+                time_entry = to_time_entry(row)
+            except ValueError as e:
+                print(f"Row {number} skipped: {e}.", file=sys.stderr)
+                counts['invalid'] += 1
+                continue
+
+            pending[executor.submit(create_time_entry, authentication, time_entry)] = number
+
+            if len(pending) >= MAX_PENDING_ROWS:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+
+            if offline:
+                break
+
+        collect(wait(pending).done)
+
+    if offline:
+        sys.exit(f"ERROR: Toggl could not be reached after importing {counts['imported']} time entries.\n"
+                 f"Run the same command again to continue the import.")
+
+    if counts['invalid'] == 0 and counts['failed'] == 0:
+        os.unlink(checkpoint_path)
+
+    return counts
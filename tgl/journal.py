@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from tgl import utils
+from tgl.client import get_client, NetworkError, RequestTimeout
+from tgl.config import config, data_dir
+
+# Timer actions that couldn't reach Toggl, one JSON object per line in the order they happened
+journal_file_path = os.path.join(data_dir, 'journal.jsonl')
+
+# Locked while an action is recorded and while the journal is replayed. The journal itself
+# is replaced when it is rewritten, so the lock is kept in a file of its own.
+lock_file_path = os.path.join(data_dir, 'journal.lock')
+
+# Seconds between the start of the timer running in Toggl and the time a start was recorded
+# for the timer to count as the one that start asked for
+START_TIME_TOLERANCE = 60
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def has_entries() -> bool:
+    try:
+        return os.path.getsize(journal_file_path) > 0
+    except OSError:
+        return False
+
+
+@contextmanager
+def _locked() -> Iterator[None]:
+    """ Keep other tgl processes from changing the journal, so no action is lost while it is replayed. """
+    # File locks are only available on POSIX systems
+    if os.name != 'posix':
+        yield
+        return
+
+    import fcntl
+
+    os.makedirs(os.path.dirname(lock_file_path), exist_ok=True)
+    with open(lock_file_path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def record(action: str, at: Optional[str] = None, **data) -> str:
+    """ Append a timer action that happened `at`, or now, to the journal and return its time. """
+    entry = dict(data, action=action, at=at or now())
+
+    with _locked(), open(journal_file_path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+    return entry['at']
+
+
+def read_entries() -> List[dict]:
+    if not has_entries():
+        return []
+
+    with open(journal_file_path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _write_entries(entries: List[dict]) -> None:
+    if len(entries) == 0:
+        os.unlink(journal_file_path)
+        return
+
+    temp_path = journal_file_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
+    os.replace(temp_path, journal_file_path)
+
+
+def _epoch(timestamp: str) -> int:
+    return int(utils.parse_time(timestamp).timestamp())
+
+
+def _should_retry(status_code: int) -> bool:
+    """ Check if a refused action has to stay in the journal to be sent again later.
+
+    The credentials being refused, too many requests and errors of Toggl itself don't say
+    anything about the action. Any other error means Toggl will never accept it.
+    """
+    return status_code in (401, 403, 408, 429) or status_code >= 500
+
+
+def _get_running_entry(authentication: Tuple[str, str]) -> Tuple[int, Optional[dict]]:
+    response = get_client().get(config['URI']['CURRENT'], auth=authentication)
+
+    if response.status_code != 200:
+        return response.status_code, None
+
+    return 200, response.json()['data']
+
+
+def _was_started(running: Optional[dict], entry: dict) -> bool:
+    """ Check if the timer running in Toggl is the one a start that timed out asked for. """
+    if running is None or running.get('description') != entry['time_entry'].get('description'):
+        return False
+
+    return abs(_epoch(running['start']) - _epoch(entry['at'])) <= START_TIME_TOLERANCE
+
+
+def _stop_running_entry(authentication: Tuple[str, str], running: Optional[dict], stopped_at: str) -> int:
+    """ Stop `running` at the time the stop was recorded and return the status of the response. """
+    if running is None:
+        return 200
+
+    header = {"Content-Type": "application/json", }
+    data = {'time_entry': {
+        'stop': stopped_at,
+        'duration': _epoch(stopped_at) - _epoch(running['start'])}
+    }
+
+    response = get_client().put(
+        config['URI']['TIME_ENTRY'].format(running['id']),
+        headers=header,
+        data=json.dumps(data),
+        auth=authentication
+    )
+
+    return response.status_code
+
+
+def _start_entry(authentication: Tuple[str, str], time_entry: dict, started_at: str) -> Tuple[int, Optional[dict]]:
+    header = {"Content-Type": "application/json", }
+
+    # A negative duration is how Toggl marks a time entry that is still running
+    data = {'time_entry': dict(time_entry, start=started_at, duration=-_epoch(started_at))}
+
+    response = get_client().post(
+        config['URI']['TIME_ENTRIES'],
+        headers=header,
+        data=json.dumps(data),
+        auth=authentication
+    )
+
+    if response.status_code != 200:
+        return response.status_code, None
+
+    return 200, response.json()['data']
+
+
+def _send_entry(authentication: Tuple[str, str], entry: dict, running: Optional[dict],
+                look_up: bool) -> Tuple[int, Optional[dict]]:
+    """ Send one journaled action and return the status of its response and the timer left running. """
+    if look_up:
+        status_code, running = _get_running_entry(authentication)
+
+        if status_code != 200:
+            return status_code, running
+
+    if entry['action'] == 'stop':
+        status_code = _stop_running_entry(authentication, running, entry['at'])
+        return status_code, None if status_code == 200 else running
+
+    # A start whose request timed out may have reached Toggl anyway, and sending it
+    # again would create a second time entry
+    if entry.get('maybe_sent') and _was_started(running, entry):
+        return 200, running
+
+    # Starting a timer in Toggl stops the one that was running at that moment. A stop
+    # that Toggl refuses for good doesn't keep the timer from starting.
+    status_code = _stop_running_entry(authentication, running, entry['at'])
+    if status_code != 200 and _should_retry(status_code):
+        return status_code, running
+
+    return _start_entry(authentication, entry['time_entry'], entry['at'])
+
+
+def replay(authentication: Tuple[str, str]) -> None:
+    """ Send the journaled timer actions to Toggl in the order they were recorded.
+
+    Raises NetworkError if Toggl still can't be reached. The sending stops at the first
+    action that fails, and it and the actions after it are kept in the journal for the
+    next try. Only an action that Toggl refuses for good is dropped.
+    """
+    # Actions recorded by other processes wait until the replay is done, and a second
+    # replay only starts once this one has rewritten the journal
+    with _locked():
+        _replay_entries(authentication)
+
+
+def _replay_entries(authentication: Tuple[str, str]) -> None:
+    entries = read_entries()
+
+    if len(entries) == 0:
+        return
+
+    # The timer running in Toggl is only looked up for the first action. After that it is
+    # whatever the replayed actions left running.
+    running: Optional[dict] = None
+    look_up = True
+
+    for i, entry in enumerate(entries):
+        try:
+            status_code, running = _send_entry(authentication, entry, running, look_up)
+        except RequestTimeout:
+            if entry['action'] == 'start':
+                entries[i] = dict(entry, maybe_sent=True)
+
+            _write_entries(entries[i:])
+            raise
+        except NetworkError:
+            _write_entries(entries[i:])
+            raise
+
+        look_up = False
+
+        if status_code == 200:
+            continue
+
+        if _should_retry(status_code):
+            _write_entries(entries[i:])
+            print(f"WARNING: Offline timer {entry['action']} from {entry['at']} could not be sent to Toggl. "
+                  f"Response: {status_code}\nIt will be sent again by the next command.", file=sys.stderr)
+            return
+
+        print(f"WARNING: Offline timer {entry['action']} from {entry['at']} was refused by Toggl and dropped. "
+              f"Response: {status_code}", file=sys.stderr)
+
+        # What the refused action left running in Toggl isn't known
+        look_up = True
+
+    _write_entries([])
+    utils.cache_current_timer(running)
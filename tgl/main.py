@@ -1,16 +1,31 @@
 import os
 import sys
+import time
 import argparse
-from getpass import getpass
-from typing import Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
+# Imported first so that the trace can tell how long importing the rest of tgl took
+from tgl import trace
 from tgl import utils
 from tgl import timers
+from tgl import daemon
+from tgl import journal
+from tgl import db
+from tgl import reports
+from tgl import exports
+from tgl import imports
+from tgl.client import NetworkError, RequestTimeout, DEFAULT_TIME_BUDGET, set_time_budget
+from tgl.config import config, credentials_file_path
 
-config_file_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data', 'config.json')
+if TYPE_CHECKING:
+    from datetime import date
+
+BULK_COMMANDS = ('sync', 'report', 'export', 'import')
 
 
 def main(file_name_junk, *argv) -> None:
+    main_started_at = time.perf_counter()
+
     parser = create_parser()
 
     if len(argv) <= 0:
@@ -18,7 +33,85 @@ def main(file_name_junk, *argv) -> None:
         sys.exit()
 
     args = parser.parse_args(argv)
-    args.func(parser, args)
+
+    trace_format = trace.get_env_format() or ('text' if args.trace else None)
+    profile_path = os.environ.get('TGL_PROFILE')
+
+    if trace_format:
+        trace.start(trace_format, main_started_at)
+
+    # Let the background daemon run the command when one is running. Traced and profiled
+    # commands always run here so that the whole command is measured.
+    if not trace_format and not profile_path and daemon.should_forward(args):
+        code = daemon.forward(argv)
+
+        if code is not None:
+            sys.exit(code)
+
+    try:
+        if profile_path:
+            run_profiled_command(parser, args, profile_path)
+        else:
+            run_command(parser, args)
+    finally:
+        if trace_format:
+            trace.report()
+
+
+def run_profiled_command(parser, args, profile_path: str) -> None:
+    """ Run the command under cProfile and write the stats to `profile_path`. """
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run_command, parser, args)
+    finally:
+        profiler.dump_stats(profile_path)
+
+
+def run_command(parser, args) -> None:
+    # The daemon runs every command it is sent through this function, each in its own batch.
+    # It can't be inside a batch itself, or nothing would be written until it stops.
+    if args.command == 'daemon':
+        args.func(parser, args)
+        return
+
+    set_time_budget(get_time_budget(args))
+
+    # All the config changes made by the command are written to disk once it finishes
+    with config.batch():
+        try:
+            if journal.has_entries() and not utils.are_defaults_empty():
+                with trace.phase('replay journal'):
+                    send_offline_actions()
+
+            with trace.phase('command'):
+                args.func(parser, args)
+        except RequestTimeout:
+            sys.exit("ERROR: Toggl did not answer in time. Use --timeout to wait longer.")
+        except NetworkError:
+            sys.exit("ERROR: Toggl could not be reached. Check your internet connection.")
+
+
+def get_time_budget(args) -> Optional[float]:
+    """ Seconds of network time the command has, None for no limit. """
+    if args.timeout is not None:
+        return args.timeout if args.timeout > 0 else None
+
+    # Commands that send or download every page of a long list of time entries are
+    # only limited by the timeouts of each request, unless a limit is asked for
+    if args.command in BULK_COMMANDS:
+        return None
+
+    return config.get('SETTINGS', {}).get('TIMEOUT', DEFAULT_TIME_BUDGET)
+
+
+def send_offline_actions() -> None:
+    try:
+        journal.replay(utils.auth_from_config())
+    except NetworkError:
+        # Still offline, the actions stay in the journal
+        pass
 
 
 def setuptools_entry() -> None:
@@ -30,8 +123,12 @@ def create_parser() -> argparse.ArgumentParser:
         prog='tgl',
         description='A command line interface for Toggl.'
     )
+    parser.add_argument('--timeout', required=False, dest='timeout', type=float, metavar='SECONDS',
+                        help='Seconds the command can wait for Toggl in total. Defaults to SETTINGS.TIMEOUT in the config file, 0 is no limit.')
+    parser.add_argument('--trace', required=False, dest='trace', action='store_true',
+                        help='Print how long every phase and request of the command took. TGL_TRACE=json prints it as JSON.')
 
-    commands_subparser = parser.add_subparsers(title='Commands', metavar='<commands>', help='commands')
+    commands_subparser = parser.add_subparsers(title='Commands', metavar='<commands>', help='commands', dest='command')
 
     # tgl setup
     cmd_setup = commands_subparser.add_parser('setup', help='Setup the account information for Toggl.')
@@ -40,15 +137,26 @@ def create_parser() -> argparse.ArgumentParser:
                            default='', help='Use API key instead of username and password.')
 
     # tgl reconfig
-    cmd_reconfig = commands_subparser.add_parser('reconfig', help='Reconfigure data in config.json.')
+    cmd_reconfig = commands_subparser.add_parser('reconfig', help='Reconfigure the account data.')
     cmd_reconfig.set_defaults(func=command_reconfig)
+    # Each option picks what is downloaded, so only one of them can be given
+    cmd_reconfig_scope = cmd_reconfig.add_mutually_exclusive_group()
+    cmd_reconfig_scope.add_argument('-f', '--full', required=False, dest='full', action='store_true',
+                                    help='Download everything again instead of only what changed since the last reconfig.')
+    cmd_reconfig_scope.add_argument('-w', '--workspace', required=False, dest='workspace', metavar='WORKSPACE',
+                                    help='Only download the projects of the workspace with this id or name.')
+    cmd_reconfig_scope.add_argument('-p', '--projects-only', required=False, dest='projects_only', action='store_true',
+                                    help='Only reconfigure the projects, leaving the workspaces and defaults alone.')
 
     # tgl start
     cmd_start = commands_subparser.add_parser('start', help='Start a Toggl timer.')
     cmd_start.set_defaults(func=command_start)
     cmd_start.add_argument('description', help='Timer description, use quotes around it unless it is one word.')
-    cmd_start.add_argument('-p', '--project', required=False, dest='project',
-                           action='store_true', help='Start timer in select project.')
+    cmd_start_project = cmd_start.add_mutually_exclusive_group()
+    cmd_start_project.add_argument('-p', '--project', required=False, dest='project',
+                                   action='store_true', help='Start timer in select project.')
+    cmd_start_project.add_argument('-n', '--project-name', required=False, dest='project_name', metavar='NAME',
+                                   help='Start timer in the project with this NAME, or the start of it, without selecting it.')
     cmd_start.add_argument(
         '-t', '--tags', required=False, dest='tags', default=[],
         nargs='*',
@@ -58,22 +166,65 @@ def create_parser() -> argparse.ArgumentParser:
                            action='store_true', help='Select workspace to use for timer.')
     cmd_start.add_argument('-b', '--billable', required=False, dest='billable',
                            action='store_true', help='Set as billable hours. (For Toggl Pro members only).')
+    cmd_start.add_argument('-c', '--confirm', required=False, dest='confirm', action='store_true',
+                           help='Ask before stopping a timer that is already running.')
 
     # tgl current
     cmd_current = commands_subparser.add_parser('current', help='Get current timer.')
     cmd_current.set_defaults(func=command_current)
+    cmd_current.add_argument('-r', '--refresh', required=False, dest='refresh', action='store_true',
+                             help='Get the current timer from Toggl instead of the cache.')
+
+    # tgl report
+    cmd_report = commands_subparser.add_parser('report', help='Total the tracked time by day, project, tag and workspace.')
+    cmd_report.set_defaults(func=command_report)
+    cmd_report.add_argument('-s', '--since', required=False, dest='since', type=reports.parse_date,
+                            help='First day of the report as YYYY-MM-DD. Defaults to six days before the last day.')
+    cmd_report.add_argument('-u', '--until', required=False, dest='until', type=reports.parse_date,
+                            help='Last day of the report as YYYY-MM-DD. Defaults to today.')
+    cmd_report.add_argument('-b', '--by', required=False, dest='by', choices=reports.GROUPS,
+                            help='Only total the time by this group.')
+    cmd_report.add_argument('-w', '--workspace', required=False, dest='workspace',
+                            action='store_true', help='Select the workspace to report on instead of all of them.')
+
+    # tgl export
+    cmd_export = commands_subparser.add_parser('export', help='Export time entries as CSV or JSON lines.')
+    cmd_export.set_defaults(func=command_export)
+    cmd_export.add_argument('-s', '--since', required=False, dest='since', type=reports.parse_date,
+                            help='First day to export as YYYY-MM-DD. Defaults to six days before the last day.')
+    cmd_export.add_argument('-u', '--until', required=False, dest='until', type=reports.parse_date,
+                            help='Last day to export as YYYY-MM-DD. Defaults to today.')
+    cmd_export.add_argument('-f', '--format', required=False, dest='format', choices=exports.FORMATS,
+                            default='csv', help='Format of the exported time entries. Defaults to csv.')
+    cmd_export.add_argument('-o', '--output', required=False, dest='output',
+                            help='File to write the time entries to instead of the standard output.')
+    cmd_export.add_argument('-w', '--workspace', required=False, dest='workspace',
+                            action='store_true', help='Select the workspace to export instead of all of them.')
+
+    # tgl import
+    cmd_import = commands_subparser.add_parser('import', help='Create time entries from a CSV or JSON lines file.')
+    cmd_import.set_defaults(func=command_import)
+    cmd_import.add_argument('file', help='File with the time entries, with the same columns as "tgl export".')
+    cmd_import.add_argument('-f', '--format', required=False, dest='format', choices=imports.FORMATS,
+                            help='Format of the file. Defaults to jsonl for .jsonl files and csv for the rest.')
 
     # tgl stop
     cmd_stop = commands_subparser.add_parser('stop', help='Stop current timer.')
     cmd_stop.set_defaults(func=command_stop)
+    cmd_stop.add_argument('-r', '--refresh', required=False, dest='refresh', action='store_true',
+                          help='Get the current timer from Toggl instead of the cache.')
 
     # tgl pause
     cmd_pause = commands_subparser.add_parser('pause', help='Pause the current timer to resume later.')
     cmd_pause.set_defaults(func=command_pause)
+    cmd_pause.add_argument('-r', '--refresh', required=False, dest='refresh', action='store_true',
+                           help='Get the current timer from Toggl instead of the cache.')
 
     # tgl resume
     cmd_resume = commands_subparser.add_parser('resume', help='Resume a previously paused timer.')
     cmd_resume.set_defaults(func=command_resume)
+    cmd_resume.add_argument('-r', '--refresh', required=False, dest='refresh', action='store_true',
+                            help='Get the current timer from Toggl instead of the cache.')
 
     # tgl create
     cmd_create = commands_subparser.add_parser('create', help='Create new projects.')
@@ -86,11 +237,28 @@ def create_parser() -> argparse.ArgumentParser:
     cmd_delete.set_defaults(func=command_delete)
     cmd_delete.add_argument('request', choices=['project'], help='Delete a project.')
 
+    # tgl sync
+    cmd_sync = commands_subparser.add_parser('sync', help='Download time entries into a local database.')
+    cmd_sync.set_defaults(func=command_sync)
+    cmd_sync.add_argument('-f', '--full', required=False, dest='full', action='store_true',
+                          help='Download everything again instead of only what changed since the last sync. '
+                               'Changes to time entries older than 30 days are only downloaded this way.')
+
+    # tgl daemon
+    cmd_daemon = commands_subparser.add_parser(
+        'daemon', help='Run commands through a background process to make them faster.')
+    cmd_daemon.set_defaults(func=command_daemon)
+    cmd_daemon_action = cmd_daemon.add_mutually_exclusive_group()
+    cmd_daemon_action.add_argument('--stop', required=False, dest='stop', action='store_true',
+                                   help='Stop the running daemon.')
+    cmd_daemon_action.add_argument('--status', required=False, dest='status', action='store_true',
+                                   help='Check if the daemon is running.')
+
     return parser
 
 
 def command_setup(parser, args) -> None:
-    # If the defaults in the config.json file are not empty ask if to reconfigure
+    # If the defaults in the credentials file are not empty ask if to reconfigure
     if not utils.are_defaults_empty():
         delete_data_input = input("User data is not empty. Do you want to reconfigure it? (y/N) ")
 
@@ -100,7 +268,7 @@ def command_setup(parser, args) -> None:
             sys.exit("Data was not changed.")
 
     print("    Configuring your account. Account information will be saved in plain text on")
-    print(f"    a JSON file in {config_file_path}.\n")
+    print(f"    a JSON file in {credentials_file_path}.\n")
 
     # Create authentication tuple either from email/password or API key
     if args.api:
@@ -108,6 +276,8 @@ def command_setup(parser, args) -> None:
 
         auth = (api_key, 'api_token')
     else:
+        from getpass import getpass
+
         email = input("Please enter your email address: ")
         password = getpass("Please enter your password: ")
 
@@ -117,13 +287,16 @@ def command_setup(parser, args) -> None:
     if len(auth[0]) == 0:
         sys.exit("\nNothing entered, closing program.")
 
-    # Check if the credentials are valid and then save the defaults to config.json
-    if utils.are_credentials_valid(auth):
-        utils.add_user_data_to_config(auth)
-        utils.add_projects_to_config(auth)
-    else:
+    # Everything is downloaded at once, and nothing is downloaded if the credentials are not valid
+    response = utils.get_user_data(auth)
+
+    if response is None:
         sys.exit("\nError: Incorrect credentials.")
 
+    utils.add_user_data_to_config(response['data'])
+    utils.add_projects_to_config(response['data'])
+    utils.set_sync_since(response['since'])
+
     print("\nData saved.")
 
 
@@ -132,26 +305,47 @@ def command_reconfig(parser, args) -> None:
 
     auth = utils.auth_from_config()
 
-    utils.delete_user_data()
+    # A single workspace is downloaded with its own request, which is all that is needed
+    # after creating a project on the website
+    if args.workspace is not None:
+        workspace_id = utils.get_workspace_id(args.workspace)
+        utils.replace_workspace_projects(workspace_id, utils.get_projects_from_workspace(auth, workspace_id))
+        return
 
-    if utils.are_credentials_valid(auth):
-        utils.add_user_data_to_config(auth)
-        utils.add_projects_to_config(auth)
-    else:
+    # Only what changed since the last download is asked for, unless everything was asked for
+    # or the account was set up before tgl kept track of it
+    since = None if args.full else utils.get_sync_since()
+    response = utils.get_user_data(auth, since)
+
+    if response is None:
         sys.exit("\nCredentials error. Please run 'tgl setup' to reconfigure the credential data.")
 
+    if args.projects_only:
+        if since is None:
+            utils.delete_projects()
+
+        # The time of the download is not kept, so the changes to the workspaces and defaults
+        # that were skipped are downloaded by the next reconfig
+        utils.add_projects_to_config(response['data'])
+        return
+
+    # The old data is only deleted once the new data was downloaded
+    if since is None:
+        utils.delete_user_data()
+
+    utils.add_user_data_to_config(response['data'])
+    utils.add_projects_to_config(response['data'])
+    utils.set_sync_since(response['since'])
+
 
 def command_start(parser, args) -> None:
     check_if_setup_is_needed()
 
     authentication = utils.auth_from_config()
 
-    # Check if authentication is correct/api_key wasn't changed
-    if not utils.are_credentials_valid(authentication):
-        sys.exit("ERROR: Authentication error.\nRun 'tgl setup' to reconfigure the data.")
-
-    # Check if there is already a timer running & give choice if there is
-    if utils.is_timer_running(authentication):
+    # The credentials are checked by the start request itself, so the only extra request
+    # is checking for a running timer when the user asked to confirm stopping it.
+    if args.confirm and is_timer_known_to_be_running(authentication):
         print("There is a timer currently running.")
         user_input = input("Do you want to stop the current timer and start a new one? (y/N): ")
 
@@ -165,12 +359,15 @@ def command_start(parser, args) -> None:
         workspace_id = utils.get_default_workspace()
 
     # Check if user adds the project argument then calls a function to check
-    # if there are projects in the users account then call the function that asks
-    # the user what project to use.
+    # if there are projects in the users account then look up the project name the
+    # user gave, or call the function that asks the user what project to use.
     project_id = ""
-    if args.project:
+    if args.project or args.project_name is not None:
         if utils.are_there_projects():
-            project_id = utils.project_selection(workspace_id)
+            if args.project_name is not None:
+                project_id = utils.get_project_id_from_name(workspace_id, args.project_name)
+            else:
+                project_id = utils.project_selection(workspace_id)
         else:
             print("WARNING: You don't have any projects in your account.\n"
                   "  If you created one recently, please run 'tgl reconfig' to reconfigure your data.\n"
@@ -191,7 +388,57 @@ def command_current(parser, args) -> None:
 
     authentication = utils.auth_from_config()
 
-    timers.current_timer(authentication)
+    timers.current_timer(authentication, refresh=args.refresh)
+
+
+def command_report(parser, args) -> None:
+    check_if_setup_is_needed()
+
+    authentication = utils.auth_from_config()
+
+    since, until = get_date_range(args)
+    workspace_ids = get_workspace_ids(args)
+
+    report = reports.build_report(authentication, workspace_ids, since, until)
+
+    reports.print_report(report, since, until, groups=(args.by,) if args.by else reports.GROUPS)
+
+
+def command_export(parser, args) -> None:
+    check_if_setup_is_needed()
+
+    authentication = utils.auth_from_config()
+
+    since, until = get_date_range(args)
+    workspace_ids = get_workspace_ids(args, to_stdout=args.output is None)
+
+    if args.output is None:
+        exports.export(authentication, workspace_ids, since, until, sys.stdout, args.format)
+        return
+
+    with open(args.output, 'w', newline='') as f:
+        count = exports.export(authentication, workspace_ids, since, until, f, args.format)
+
+    print(f"Exported {count} time entries to {args.output}")
+
+
+def command_import(parser, args) -> None:
+    check_if_setup_is_needed()
+
+    if not os.path.isfile(args.file):
+        sys.exit(f"ERROR: File {args.file} does not exist.")
+
+    authentication = utils.auth_from_config()
+
+    counts = imports.import_time_entries(authentication, args.file, args.format or imports.guess_format(args.file))
+
+    print(f"Imported {counts['imported']} time entries.")
+    if counts['already_imported'] > 0:
+        print(f"    {counts['already_imported']} rows were imported before and skipped.")
+
+    if counts['invalid'] > 0 or counts['failed'] > 0:
+        sys.exit(f"ERROR: {counts['invalid'] + counts['failed']} rows were not imported.\n"
+                 f"Fix them and run the same command again to import them.")
 
 
 def command_stop(parser, args) -> None:
@@ -199,7 +446,7 @@ def command_stop(parser, args) -> None:
 
     authentication = utils.auth_from_config()
 
-    timers.stop_timer(authentication)
+    timers.stop_timer(authentication, refresh=args.refresh)
 
 
 def command_pause(parser, args) -> None:
@@ -207,7 +454,7 @@ def command_pause(parser, args) -> None:
 
     authentication = utils.auth_from_config()
 
-    timers.stop_timer(authentication, for_resume=True)
+    timers.stop_timer(authentication, for_resume=True, refresh=args.refresh)
 
 
 def command_resume(parser, args) -> None:
@@ -216,7 +463,7 @@ def command_resume(parser, args) -> None:
     authentication = utils.auth_from_config()
 
     # Check if there is already a timer running & give choice if there is
-    if utils.is_timer_running(authentication):
+    if is_timer_known_to_be_running(authentication, refresh=args.refresh):
         sys.exit('There is a timer currently running.')
 
     timers.resume_timer(authentication)
@@ -236,9 +483,6 @@ def command_create(parser, args) -> None:
             project_name=args.name
         )
 
-    # Reconfigure the config file with new changes
-    command_reconfig(parser, args)
-
 
 def command_delete(parser, args) -> None:
     check_if_setup_is_needed()
@@ -256,7 +500,65 @@ def command_delete(parser, args) -> None:
             authentication=authentication
         )
 
-    command_reconfig(parser, args)
+
+def command_sync(parser, args) -> None:
+    check_if_setup_is_needed()
+
+    authentication = utils.auth_from_config()
+
+    counts = db.sync(authentication, full=args.full)
+
+    print(f"Time entries synced to {db.database_file_path}")
+    for table, (changed, deleted) in counts.items():
+        print(f"    {table.replace('_', ' ').capitalize() + ':':<14}{changed} changed, {deleted} deleted")
+
+
+def command_daemon(parser, args) -> None:
+    if not daemon.is_supported():
+        sys.exit("The daemon is not supported on this platform.")
+
+    if args.stop:
+        daemon.stop()
+    elif args.status:
+        daemon.status()
+    else:
+        daemon.serve()
+
+
+def is_timer_known_to_be_running(authentication: Tuple[str, str], refresh: bool = False) -> bool:
+    try:
+        return utils.is_timer_running(authentication, refresh=refresh)
+    except NetworkError:
+        # Without a connection the timer is started offline and saved in the journal
+        return False
+
+
+def get_date_range(args) -> Tuple['date', 'date']:
+    from datetime import date, timedelta
+
+    # Like the Toggl reports, the default is the last seven days
+    until = args.until or date.today()
+    since = args.since or until - timedelta(days=6)
+
+    if since > until:
+        sys.exit("ERROR: The first day of the range is after the last one.")
+
+    return since, until
+
+
+def get_workspace_ids(args, to_stdout: bool = False) -> List[str]:
+    """ Workspaces to read, the one the user picks with --workspace or else all of them.
+
+    When the command writes its output to the standard output, the picker is shown on the
+    standard error so it doesn't end up in the output.
+    """
+    if args.workspace:
+        if to_stdout:
+            return [utils.workspace_selection(verbose=False, file=sys.stderr)]
+
+        return [utils.workspace_selection()]
+
+    return list(config['WORKSPACES'])
 
 
 def check_if_setup_is_needed() -> None:
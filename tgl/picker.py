@@ -0,0 +1,111 @@
+import sys
+from typing import List, Optional, TextIO, Tuple
+
+# Choices printed at once, so long lists don't scroll off the screen
+PAGE_SIZE = 20
+
+
+class Picker:
+    """ Numbered list of choices shown one page at a time and narrowed down by typing part of a name.
+
+    `choices` are (id, name) pairs. They are lowercased once when the picker is created, and
+    a filter that only adds to the previous one is searched for in the previous matches
+    instead of in every choice. A number picks the choice with that number, so a filter
+    made only of digits is typed after a '/'.
+    """
+
+    def __init__(self, choices: List[Tuple[str, str]], none_choice: Optional[str] = None) -> None:
+        self.index = [(name.lower(), choice_id, name) for choice_id, name in choices]
+        self.none_choice = none_choice
+
+        self.filter = ''
+        self.matches = self.index
+        self.page = 0
+
+    def narrow(self, text: str) -> None:
+        text = text.lower()
+
+        candidates = self.matches if self.filter in text else self.index
+        self.matches = [choice for choice in candidates if text in choice[0]]
+        self.filter = text
+        self.page = 0
+
+    def next_page(self) -> None:
+        self.page += 1
+
+        # Go back to the first page after the last one
+        if self.page * PAGE_SIZE >= len(self.matches):
+            self.page = 0
+
+    def render(self) -> str:
+        lines = []
+
+        if self.none_choice is not None:
+            lines.append(f"0: {self.none_choice}")
+            lines.append("--------------------------")
+
+        first = self.page * PAGE_SIZE
+        for number, (_, _, name) in enumerate(self.matches[first:first + PAGE_SIZE], start=first + 1):
+            lines.append(f"{number}: {name}")
+
+        if len(self.matches) == 0:
+            lines.append(f'Nothing matches "{self.filter}".')
+
+        if self.filter or len(self.matches) > PAGE_SIZE:
+            last = min(first + PAGE_SIZE, len(self.matches))
+            lines.append(f"\n(Showing {first + 1 if last else 0}-{last} of {len(self.matches)}"
+                         + (f' matching "{self.filter}"' if self.filter else '')
+                         + ". Type part of a name (after a / if it's a number) to narrow the list"
+                         + (", or press enter for the next page" if len(self.matches) > PAGE_SIZE else '')
+                         + ".)")
+
+        return '\n'.join(lines)
+
+    def get(self, number: int) -> Optional[str]:
+        """ Return the id of the choice with that number, '' for the none choice and None if there is none. """
+        if number == 0 and self.none_choice is not None:
+            return ''
+
+        if 1 <= number <= len(self.matches):
+            return self.matches[number - 1][1]
+
+        return None
+
+
+def pick(choices: List[Tuple[str, str]], prompt: str, none_choice: Optional[str] = None,
+         invalid_message: str = "\nERROR: Selection not valid.", file: Optional[TextIO] = None) -> str:
+    """ Ask the user to pick one of the (id, name) `choices` and return its id.
+
+    Entering 0 picks `none_choice` when there is one, and returns ''. The choices and the
+    prompt are shown on `file`, the standard output by default.
+    """
+    picker = Picker(choices, none_choice)
+
+    print(file=file)
+    while True:
+        print(picker.render(), file=file)
+
+        try:
+            if file is None:
+                selection = input(f"\n{prompt}").strip()
+            else:
+                print(f"\n{prompt}", end='', file=file, flush=True)
+                selection = input().strip()
+        except EOFError:
+            sys.exit("\nERROR: Nothing was selected.")
+
+        if selection == '':
+            picker.next_page()
+        elif selection.startswith('/'):
+            picker.narrow(selection[1:])
+        elif selection.isdigit():
+            choice_id = picker.get(int(selection))
+
+            if choice_id is None:
+                sys.exit(invalid_message)
+
+            return choice_id
+        else:
+            picker.narrow(selection)
+
+        print(file=file)
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import threading
+from typing import Tuple
+
+from tgl.config import config, data_dir
+
+# Toggl allows about one request per second per API token, with short bursts above that.
+# SETTINGS.REQUESTS_PER_SECOND and SETTINGS.REQUEST_BURST in the config file override these.
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+DEFAULT_REQUEST_BURST = 4
+
+# Tokens left in the bucket shared by every tgl process, and when they were counted
+bucket_file_path = os.path.join(data_dir, 'ratelimit.json')
+
+
+class TokenBucket:
+    """ Lets `rate` calls through every second on average, and up to `capacity` at once. """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def acquire(self) -> None:
+        """ Take a token, waiting until one is available. """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = self._take(self._tokens, now - self._updated_at)
+            self._updated_at = now
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def _take(self, tokens: float, elapsed: float) -> Tuple[float, float]:
+        """ Return the tokens left after taking one and the seconds to wait for it. """
+        tokens = min(self.capacity, tokens + max(0.0, elapsed) * self.rate)
+
+        # The token is taken right away, so callers that have to wait are let through
+        # in the order they asked
+        tokens -= 1
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+
+        return tokens, wait
+
+
+class SharedTokenBucket(TokenBucket):
+    """ TokenBucket kept in a file, so every tgl process running at the same time shares it. """
+
+    def __init__(self, path: str, rate: float, capacity: float) -> None:
+        super().__init__(rate, capacity)
+        self.path = path
+
+    def acquire(self) -> None:
+        import fcntl
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with self._lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+
+            f.seek(0)
+            try:
+                state = json.loads(f.read())
+            except ValueError:
+                state = {'tokens': self.capacity, 'updated_at': 0}
+
+            # Wall clock time, since the monotonic clock is not shared between processes
+            now = time.time()
+            tokens, wait = self._take(state['tokens'], now - state['updated_at'])
+
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({'tokens': tokens, 'updated_at': now}))
+            f.flush()
+
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+def get_toggl_bucket() -> TokenBucket:
+    """ Return a bucket sized to the Toggl API quota, or to the limits in the config file. """
+    settings = config.get('SETTINGS', {})
+    rate = settings.get('REQUESTS_PER_SECOND', DEFAULT_REQUESTS_PER_SECOND)
+    capacity = settings.get('REQUEST_BURST', DEFAULT_REQUEST_BURST)
+
+    # File locks are only available on POSIX systems, elsewhere every process has its own bucket
+    if os.name != 'posix':
+        return TokenBucket(rate, capacity)
+
+    return SharedTokenBucket(bucket_file_path, rate, capacity)
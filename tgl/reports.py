@@ -0,0 +1,140 @@
+import sys
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+
+from tgl.client import get_client
+from tgl.config import config
+
+if TYPE_CHECKING:
+    from datetime import date
+
+# The Reports API asks every client to identify itself
+USER_AGENT = 'tgl'
+
+GROUPS = ('day', 'project', 'tag', 'workspace')
+
+
+def parse_date(value: str) -> 'date':
+    """ argparse type for the YYYY-MM-DD dates of the report range. """
+    import argparse
+    from datetime import datetime
+
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: '{value}' (use YYYY-MM-DD)")
+
+
+def get_time_entry_pages(authentication: Tuple[str, str], workspace_id: str,
+                         since: 'date', until: 'date') -> Iterator[List[dict]]:
+    """ Yield the detailed time entries of a workspace one page at a time.
+
+    Only the page being read is in memory, the next one is requested once it is consumed.
+    """
+    url = config['URI']['REPORT_DETAILS']
+    page = 1
+
+    while True:
+        params = {
+            'workspace_id': workspace_id,
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            'user_agent': USER_AGENT,
+            'page': page,
+        }
+
+        response = get_client().get(url, params=params, auth=authentication)
+
+        if response.status_code != 200:
+            sys.exit(f"ERROR: Time entries could not be downloaded. Response: {response.status_code}")
+
+        response_json = response.json()
+        entries = response_json['data']
+
+        if len(entries) > 0:
+            yield entries
+
+        if len(entries) == 0 or page * response_json['per_page'] >= response_json['total_count']:
+            return
+
+        page += 1
+
+
+class Totals:
+    """ Milliseconds summed by key.
+
+    Every key gets an index into a single array of totals, so the memory used depends on the
+    number of keys and not on the number of time entries added.
+    """
+
+    def __init__(self) -> None:
+        self.indexes: Dict[str, int] = {}
+        self.milliseconds = array('q')
+
+    def add(self, keys: List[str], durations: 'array') -> None:
+        """ Add the `durations` column to the totals of the `keys` column. """
+        indexes = self.indexes
+        totals = self.milliseconds
+
+        for key, duration in zip(keys, durations):
+            index = indexes.get(key)
+
+            if index is None:
+                index = indexes[key] = len(totals)
+                totals.append(0)
+
+            totals[index] += duration
+
+    def items(self) -> List[Tuple[str, int]]:
+        return sorted((key, self.milliseconds[index] // 1000) for key, index in self.indexes.items())
+
+
+def build_report(authentication: Tuple[str, str], workspace_ids: List[str],
+                 since: 'date', until: 'date') -> Dict[str, Totals]:
+    """ Total the durations of the time entries in the range by day, project, tag and workspace. """
+    report = {group: Totals() for group in GROUPS}
+
+    for workspace_id in workspace_ids:
+        workspace_name = config['WORKSPACES'].get(workspace_id, workspace_id)
+
+        for entries in get_time_entry_pages(authentication, workspace_id, since, until):
+            # Every page is turned into columns that are added to the totals in one go
+            durations = array('q', [entry['dur'] or 0 for entry in entries])
+
+            report['day'].add([entry['start'][:10] for entry in entries], durations)
+            report['project'].add([entry['project'] or '(No project)' for entry in entries], durations)
+            report['workspace'].add([workspace_name], array('q', [sum(durations)]))
+
+            # A time entry counts towards every one of its tags
+            tags = []
+            tag_durations = array('q')
+            for entry, duration in zip(entries, durations):
+                entry_tags = entry['tags'] or ['(No tags)']
+                tags.extend(entry_tags)
+                tag_durations.extend([duration] * len(entry_tags))
+
+            report['tag'].add(tags, tag_durations)
+
+    return report
+
+
+def format_duration(seconds: int) -> str:
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+
+    return f"{hours}:{minutes:02}:{seconds:02}"
+
+
+def print_report(report: Dict[str, Totals], since: 'date', until: 'date', groups: Tuple[str, ...] = GROUPS) -> None:
+    print(f"Report from {since} to {until}")
+
+    for group in groups:
+        items = report[group].items()
+        width = max([len(key) for key, _ in items] + [10])
+
+        print(f"\nBy {group}:")
+        for key, seconds in items:
+            print(f"    {key:<{width}}  {format_duration(seconds):>10}")
+
+    total = sum(seconds for _, seconds in report['workspace'].items())
+    print(f"\nTotal: {format_duration(total)}")
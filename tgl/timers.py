@@ -1,15 +1,18 @@
-import os
 import sys
 import json
-import requests
-from typing import Tuple, List
+from typing import TYPE_CHECKING, Tuple, List, Optional
 
 from tgl import utils
+from tgl import journal
+from tgl.client import get_client, NetworkError, RequestTimeout
+from tgl.config import config
 
-config_file_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data', 'config.json')
+if TYPE_CHECKING:
+    from datetime import datetime
 
-with open(config_file_path, 'r') as f:
-    config = json.load(f)
+# Seconds between the stop time returned by the API and now for a stop request to count
+# as the one that stopped the timer. Older stop times mean it was stopped somewhere else.
+STOP_TIME_TOLERANCE = 60
 
 
 def start_timer(description: str, authentication: Tuple[str, str],
@@ -27,44 +30,70 @@ def start_timer(description: str, authentication: Tuple[str, str],
         'created_with': 'tgl'}
     }
 
-    response = requests.post(
-        url,
-        headers=header,
-        data=json.dumps(data),
-        auth=authentication
-    )
+    sent_at = journal.now()
+    try:
+        response = _post_unless_offline(url, header, data, authentication)
+    except NetworkError as e:
+        _start_offline(data['time_entry'], sent_at, e)
+        print("Timer started offline. It will be sent to Toggl the next time tgl can connect.")
+        return
 
     if response.status_code == 200:
+        utils.cache_current_timer(response.json()['data'])
         print("Timer started.")
+    elif response.status_code in (401, 403):
+        sys.exit("ERROR: Authentication error.\nRun 'tgl setup' to reconfigure the data.")
     else:
         sys.exit(f"ERROR: Timer not started. Response: {response.status_code}")
 
 
-def current_timer(authentication: Tuple[str, str]) -> None:
-    from datetime import datetime, timezone
-    url = config['URI']['CURRENT']
+def _post_unless_offline(url: str, header: dict, data: dict, authentication: Tuple[str, str]):
+    # Actions that are still waiting in the journal have to reach Toggl first,
+    # so new ones go straight into the journal behind them
+    if journal.has_entries():
+        raise NetworkError("There are offline timer actions that haven't been sent.")
 
-    response = requests.get(
+    return get_client().post(
         url,
+        headers=header,
+        data=json.dumps(data),
         auth=authentication
     )
 
-    response_json = response.json()
+
+def _start_offline(time_entry: dict, sent_at: str, error: NetworkError) -> None:
+    if isinstance(error, RequestTimeout):
+        # Toggl may have started the timer without answering in time, so the start is only
+        # sent again if Toggl isn't running a timer that started when the request was sent
+        started_at = journal.record('start', at=sent_at, time_entry=time_entry, maybe_sent=True)
+    else:
+        started_at = journal.record('start', time_entry=time_entry)
+
+    # Cache the timer without an id so `tgl current` and `tgl stop` know about it
+    utils.cache_current_timer(dict(time_entry, id=None, start=started_at))
+
+
+def current_timer(authentication: Tuple[str, str], refresh: bool = False) -> None:
+    from datetime import datetime, timezone
+
+    try:
+        timer_data = utils.get_current_timer(authentication, refresh=refresh)
+    except NetworkError:
+        # Show the last timer tgl knows about rather than nothing
+        if len(config.get('CURRENT_TIMER', {})) == 0:
+            raise
+
+        timer_data = utils.get_started_timer()
+        print("WARNING: Toggl could not be reached, this is the last timer tgl knows about.", file=sys.stderr)
 
     # Check if there is a timer currently running
-    if response_json['data'] is None:
+    if timer_data is None:
         sys.exit("There is no timer currently running.")
 
-    timer_description = response_json['data']['description']
-    start_time = response_json['data']['start']
-
-    # Since Python 3.6 is supported, the ':' in the timezone has to be removed from the time
-    # This changed in Python 3.7 where %z can accept the ':' in the timezone
-    if start_time[-3] == ':':
-        start_time = start_time[:-3] + start_time[-2:]
+    timer_description = timer_data['description']
 
     # Calculate how long the timer has been active
-    start_time_object = datetime.strptime(start_time, '%Y-%m-%dT%H:%M:%S%z')
+    start_time_object = utils.parse_time(timer_data['start'])
     current_time_object = datetime.utcnow().replace(tzinfo=timezone.utc).replace(microsecond=0)
     running_time = current_time_object - start_time_object
 
@@ -73,34 +102,88 @@ def current_timer(authentication: Tuple[str, str]) -> None:
     print(f"    Running time: {running_time}")
 
 
-def stop_timer(authentication: Tuple[str, str], for_resume: bool = False) -> None:
-    current_url = config['URI']['CURRENT']
-    stop_url = config['URI']['STOP']
+def _stop_time_entry(authentication: Tuple[str, str], timer_id: int):
+    stop_url = config['URI']['STOP'].format(timer_id)
 
     header = {"Content-Type": "application/json", }
 
-    response = requests.get(
-        current_url,
+    return get_client().put(
+        stop_url,
+        headers=header,
         auth=authentication
     )
 
-    response_json = response.json()
 
-    if response_json['data'] is None:
-        sys.exit("There is no timer currently running.")
+def _was_already_stopped(response) -> bool:
+    """ Check if the stop request was for a time entry that wasn't running anymore. """
+    if response.status_code == 404:
+        return True
 
-    timer_id = response_json['data']['id']
-    timer_description = response_json['data']['description']
+    if response.status_code != 200:
+        return False
 
-    stop_url = stop_url.format(timer_id)
+    # Stopping an entry that was already stopped returns it with its original stop time
+    stop_time = response.json()['data'].get('stop')
+    if stop_time is None:
+        return False
 
-    response = requests.put(
-        stop_url,
-        headers=header,
-        auth=authentication
-    )
+    # The stop time is compared with the server's clock, since the local one may be off
+    return (_get_response_time(response) - utils.parse_time(stop_time)).total_seconds() > STOP_TIME_TOLERANCE
+
+
+def _get_response_time(response) -> 'datetime':
+    """ Time the server sent the response at, from its Date header, or the local time without one. """
+    from datetime import datetime, timezone
+    from email.utils import parsedate_to_datetime
+
+    date = response.headers.get('Date')
+    if date:
+        try:
+            return parsedate_to_datetime(date)
+        except (TypeError, ValueError):
+            pass
+
+    return datetime.utcnow().replace(tzinfo=timezone.utc)
+
+
+def stop_timer(authentication: Tuple[str, str], for_resume: bool = False, refresh: bool = False) -> None:
+    # The id of the timer started by tgl is used even when the cache is older than its TTL,
+    # so stopping only takes one request. The current timer is only looked up when the id
+    # isn't known or when the server says that time entry isn't running anymore.
+    timer_data = None if refresh else utils.get_started_timer()
+    response = None
+
+    try:
+        if journal.has_entries():
+            raise NetworkError("There are offline timer actions that haven't been sent.")
+
+        if timer_data is not None and timer_data['id'] is not None:
+            response = _stop_time_entry(authentication, timer_data['id'])
+
+            if _was_already_stopped(response):
+                timer_data = utils.get_current_timer(authentication, refresh=True)
+                response = None
+        else:
+            timer_data = utils.get_current_timer(authentication, refresh=refresh)
+
+        if timer_data is None:
+            sys.exit("There is no timer currently running.")
+
+        if response is None:
+            response = _stop_time_entry(authentication, timer_data['id'])
+    except NetworkError:
+        # The timer can't be refreshed without a connection, so the last one tgl knows about is stopped
+        if timer_data is None:
+            timer_data = utils.get_started_timer()
+
+        _stop_offline(timer_data, for_resume)
+        return
+
+    timer_description = timer_data['description']
 
     if response.status_code == 200:
+        utils.cache_current_timer(None)
+
         if for_resume:
             utils.add_previous_timer_to_config(response.json())
             print(f'Timer "{timer_description}" paused.\nResume using "tgl resume".')
@@ -111,6 +194,29 @@ def stop_timer(authentication: Tuple[str, str], for_resume: bool = False) -> Non
         sys.exit(f"ERROR: Timer could not be stopped. Response: {response.status_code}")
 
 
+def _stop_offline(timer_data: Optional[dict], for_resume: bool) -> None:
+    if timer_data is None and len(config.get('CURRENT_TIMER', {})) > 0:
+        sys.exit("There is no timer currently running.")
+
+    # Pausing needs the timer data to be able to resume it later
+    if for_resume and timer_data is None:
+        sys.exit("ERROR: Toggl could not be reached and the current timer is unknown, so it can't be paused.")
+
+    journal.record('stop')
+    utils.cache_current_timer(None)
+
+    description = '' if timer_data is None else f' "{timer_data["description"]}"'
+
+    if for_resume:
+        utils.add_previous_timer_to_config({'data': timer_data})
+        print(f'Timer{description} paused offline. Resume using "tgl resume".')
+    else:
+        utils.remove_previous_timer_from_config()
+        print(f'Timer{description} stopped offline.')
+
+    print("It will be sent to Toggl the next time tgl can connect.")
+
+
 def resume_timer(authentication: Tuple[str, str]) -> None:
     if len(config['PREVIOUS_TIMER']) == 0:
         sys.exit('There is no paused timer. Use "tgl start" to start a new timer.')
@@ -134,14 +240,17 @@ def resume_timer(authentication: Tuple[str, str]) -> None:
         'created_with': 'tgl'}
     }
 
-    response = requests.post(
-        url,
-        headers=header,
-        data=json.dumps(data),
-        auth=authentication
-    )
+    sent_at = journal.now()
+    try:
+        response = _post_unless_offline(url, header, data, authentication)
+    except NetworkError as e:
+        _start_offline(data['time_entry'], sent_at, e)
+        utils.remove_previous_timer_from_config()
+        print(f'Timer "{description}" resumed offline. It will be sent to Toggl the next time tgl can connect.')
+        return
 
     if response.status_code == 200:
+        utils.cache_current_timer(response.json()['data'])
         print(f'Timer "{description}" resumed.')
         utils.remove_previous_timer_from_config()
     else:
@@ -157,7 +266,7 @@ def create_project(authentication: Tuple[str, str], workspace_id: str, project_n
         'wid': workspace_id}
     }
 
-    response = requests.post(
+    response = get_client().post(
         url,
         headers=header,
         data=json.dumps(data),
@@ -167,6 +276,7 @@ def create_project(authentication: Tuple[str, str], workspace_id: str, project_n
     workspace_name = config["WORKSPACES"][str(workspace_id)]
 
     if response.status_code == 200:
+        utils.add_project_to_config(response.json())
         print(f'\nProject "{project_name}" has been created in the "{workspace_name}" workspace.')
     else:
         # Can't strip("\n") when using f-strings so chr(10) is equivalent
@@ -177,12 +287,13 @@ def delete_project(authentication: Tuple[str, str]) -> None:
     deleting_pid = utils.get_project_id_from_user_selection()
     url = config['URI']['PROJECTS'] + f'/{deleting_pid}'
 
-    response = requests.delete(
+    response = get_client().delete(
         url=url,
         auth=authentication
     )
 
     if response.status_code == 200:
+        utils.remove_project_from_config(deleting_pid)
         print(f'\nProject was deleted.')
     else:
         sys.exit(f'\nERROR: Project could not be deleted.\nResponse: "{response.text}"')
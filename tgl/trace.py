@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import json
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+# Timings of the phases and HTTP requests of a command, printed with --trace or TGL_TRACE.
+# Nothing is recorded unless tracing was started, so the rest of tgl can call into this
+# module without slowing down normal runs.
+
+# When tgl started importing its modules, since this module is the first one tgl.main imports
+started_at = time.perf_counter()
+
+enabled = False
+output_format = 'text'
+phases: List[Tuple[str, float]] = []
+requests: List[dict] = []
+
+
+def get_env_format() -> Optional[str]:
+    """ Output format asked for with TGL_TRACE, 'json' for JSON and any other value for text. """
+    value = os.environ.get('TGL_TRACE', '')
+
+    if value in ('', '0'):
+        return None
+
+    return 'json' if value.lower() == 'json' else 'text'
+
+
+def start(trace_format: str, main_started_at: float) -> None:
+    """ Start recording, with the phases that ran before tracing was turned on. """
+    global enabled, output_format
+
+    enabled = True
+    output_format = trace_format
+
+    process_age = _get_process_age()
+    if process_age is not None:
+        phases.append(('interpreter', max(0.0, process_age - (time.perf_counter() - started_at))))
+
+    phases.append(('import', main_started_at - started_at))
+    phases.append(('parse arguments', time.perf_counter() - main_started_at))
+
+
+def _get_process_age() -> Optional[float]:
+    """ Seconds since the process started, only known on Linux. """
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            # The process start time is the 22nd field, in clock ticks after boot.
+            # The name in the 2nd field can have spaces, so the fields are counted after it.
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+
+        with open('/proc/uptime', 'r') as f:
+            uptime = float(f.read().split()[0])
+
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    if not enabled:
+        yield
+        return
+
+    phase_started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((name, time.perf_counter() - phase_started_at))
+
+
+def record_request(method: str, url_template: str, status: Optional[int], seconds: float, rate_limit_seconds: float,
+                   bytes_sent: int, bytes_received: int, reused_connection: bool) -> None:
+    requests.append({
+        'method': method,
+        'url': url_template,
+        'status': status,
+        'ms': round(seconds * 1000, 1),
+        'rate_limit_ms': round(rate_limit_seconds * 1000, 1),
+        'bytes_sent': bytes_sent,
+        'bytes_received': bytes_received,
+        'reused_connection': reused_connection,
+    })
+
+
+def report() -> None:
+    """ Print what was recorded to stderr, so it doesn't mix with the output of the command. """
+    total = time.perf_counter() - started_at + dict(phases).get('interpreter', 0.0)
+
+    if output_format == 'json':
+        print(json.dumps({
+            'phases': [{'name': name, 'ms': round(seconds * 1000, 1)} for name, seconds in phases],
+            'requests': requests,
+            'request_count': len(requests),
+            'total_ms': round(total * 1000, 1),
+        }), file=sys.stderr)
+        return
+
+    print("\nTrace:", file=sys.stderr)
+    for name, seconds in phases:
+        print(f"    {name:<22}{seconds * 1000:>9.1f}ms", file=sys.stderr)
+
+    for request in requests:
+        connection = 'reused connection' if request['reused_connection'] else 'new connection'
+        print(f"    {request['method']:<7}{request['url']:<38}{str(request['status']):>5}{request['ms']:>9.1f}ms"
+              f"  {request['bytes_sent']}B sent  {request['bytes_received']}B received  {connection}"
+              + (f"  waited {request['rate_limit_ms']:.1f}ms for the rate limit" if request['rate_limit_ms'] >= 1 else ''),
+              file=sys.stderr)
+
+    print(f"    {len(requests)} requests, {total * 1000:.1f}ms in total", file=sys.stderr)
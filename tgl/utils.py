@@ -1,65 +1,212 @@
-import os
 import sys
-import json
-from typing import Tuple, Dict
+import time
+from typing import TYPE_CHECKING, Tuple, List, Optional, TextIO
 
-import requests
+from tgl.catalog import get_sort_key
+from tgl.client import get_client
+from tgl.config import config
 
-config_file_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data', 'config.json')
+if TYPE_CHECKING:
+    from datetime import datetime
 
-with open(config_file_path, 'r') as f:
-    config = json.load(f)
+# Toggl allows short bursts of requests per API token, so only a few are sent at once.
+MAX_CONCURRENT_REQUESTS = 4
 
+# Seconds the cached current timer is trusted before asking the API again,
+# used when SETTINGS.CURRENT_TIMER_TTL is not in the config file
+DEFAULT_CURRENT_TIMER_TTL = 30
 
-def are_credentials_valid(authentication: Tuple[str, str]) -> bool:
-    url = config['URI']['USER_INFO']
 
-    response = requests.get(url, auth=authentication)
+def get_user_data(authentication: Tuple[str, str], since: Optional[int] = None) -> Optional[dict]:
+    """ Download the user with their workspaces, projects, tags and clients in a single request.
 
-    if response.status_code == 200:
-        return True
+    With `since`, only what changed after that time is in the related data. Returns the whole
+    response, with the time of the server to continue from in 'since', or None when the
+    credentials are not valid.
+    """
+    params = {'with_related_data': 'true'}
+    if since is not None:
+        params['since'] = str(since)
 
-    return False
+    response = get_client().get(config['URI']['USER_INFO'], params=params, auth=authentication)
+
+    if response.status_code in (401, 403):
+        return None
+
+    if response.status_code != 200:
+        sys.exit(f"ERROR: Account data could not be downloaded. Response: {response.status_code}")
+
+    return response.json()
+
+
+def get_sync_since() -> Optional[int]:
+    """ Time of the last account download, or None if everything has to be downloaded. """
+    return config['SYNC'].get('SINCE')
+
+
+def set_sync_since(since: int) -> None:
+    # `since` is in whole seconds and Toggl only returns what changed after it, so a change made
+    # in the same second as the download would be missed. The next download starts a second
+    # earlier, and the changes it gets twice are applied again without harm.
+    config['SYNC']['SINCE'] = since - 1
+    config.save('SYNC')
+
+
+def add_user_data_to_config(user_data: dict) -> None:
+    config['DEFAULTS']['API_KEY'] = user_data['api_token']
+    config['DEFAULTS']['WID'] = str(user_data['default_wid'])
+
+    # Add or rename the WORKSPACES that changed and drop the deleted ones with their projects
+    for workspace in user_data.get('workspaces') or []:
+        wid = str(workspace['id'])
+
+        if workspace.get('server_deleted_at'):
+            config['WORKSPACES'].pop(wid, None)
+            config['PROJECTS'].pop(wid, None)
+        else:
+            config['WORKSPACES'][wid] = workspace['name']
+
+    config.save('DEFAULTS', 'WORKSPACES', 'PROJECTS')
+
+
+def add_projects_to_config(user_data: dict) -> None:
+    # The projects of every workspace come in one list. Archived and deleted projects
+    # can't be used for new timers, so they are removed instead of added.
+    for project in user_data.get('projects') or []:
+        wid = str(project['wid'])
+        pid = str(project['id'])
+
+        if wid not in config['WORKSPACES']:
+            continue
+
+        if project.get('server_deleted_at') or not project.get('active', True):
+            if pid not in config['PROJECTS'].get(wid, {}):
+                continue
+
+            del config['PROJECTS'][wid][pid]
+
+            # Workspaces without projects are not stored
+            if len(config['PROJECTS'][wid]) == 0:
+                del config['PROJECTS'][wid]
+        else:
+            config['PROJECTS'].setdefault(wid, {})[pid] = project['name']
+
+    config.save('PROJECTS')
+
+
+def get_workspace_id(workspace: str) -> str:
+    """ Id of the workspace in the config file with `workspace` as its id or name, ignoring case. """
+    if workspace in config['WORKSPACES']:
+        return workspace
+
+    for wid, name in config['WORKSPACES'].items():
+        if name.lower() == workspace.lower():
+            return wid
+
+    sys.exit(f'ERROR: There is no workspace "{workspace}" in the config file.\n'
+             f"If you created it recently, please run 'tgl reconfig' to reconfigure your data.")
+
+
+def get_projects_from_workspace(authentication: Tuple[str, str], workspace_id: str) -> List[dict]:
+    url = config['URI']['PROJECTS_FROM_WID'].format(workspace_id)
+
+    response = get_client().get(url, auth=authentication)
+
+    if response.status_code != 200:
+        sys.exit(f"ERROR: Projects could not be downloaded. Response: {response.status_code}")
+
+    # Toggl sends null instead of an empty list for a workspace without projects
+    return response.json() or []
+
+
+def replace_workspace_projects(workspace_id: str, project_data: List[dict]) -> None:
+    """ Replace the projects of one workspace in the config, leaving the other workspaces alone. """
+    projects = {
+        str(project['id']): project['name'] for project in project_data if project.get('active', True)
+    }
+
+    # Workspaces without projects are not stored
+    if len(projects) > 0:
+        config['PROJECTS'][workspace_id] = projects
+    else:
+        config['PROJECTS'].pop(workspace_id, None)
+
+    config.save('PROJECTS')
+
+
+def delete_projects() -> None:
+    config['PROJECTS'].clear()
+
+    config.save('PROJECTS')
 
 
-def add_user_data_to_config(authentication: Tuple[str, str]) -> None:
-    url = config['URI']['USER_INFO']
+def add_project_to_config(project_data: dict) -> None:
+    data = project_data['data']
 
-    response = requests.get(url, auth=authentication)
-    data = response.json()['data']
+    wid = str(data['wid'])
+    config['PROJECTS'].setdefault(wid, {})[str(data['id'])] = data['name']
 
-    config['DEFAULTS']['API_KEY'] = data['api_token']
-    config['DEFAULTS']['WID'] = str(data['default_wid'])
+    config.save('PROJECTS')
 
-    # Add WORKSPACES
-    workspaces_dict = dict()
-    for workspace in data['workspaces']:
-        workspaces_dict.update({str(workspace['id']): workspace['name']})
 
-    config['WORKSPACES'] = workspaces_dict
+def remove_project_from_config(project_id: str) -> None:
+    for wid in list(config['PROJECTS']):
+        config['PROJECTS'][wid].pop(str(project_id), None)
 
-    with open(config_file_path, 'w') as f:
-        json.dump(config, f, indent=4)
+        # Workspaces without projects are not stored (same as `add_projects_to_config`)
+        if len(config['PROJECTS'][wid]) == 0:
+            del config['PROJECTS'][wid]
 
+    config.save('PROJECTS')
 
-def add_projects_to_config(authentication: Tuple[str, str]) -> None:
-    url_project = config['URI']['PROJECTS_FROM_WID']
 
-    for wid in config['WORKSPACES']:
-        url_project_wid = url_project.format(wid)
+def find_projects(workspace_id: str, name: str) -> Tuple[List[Tuple[str, str]], str]:
+    """ Return the (id, name) pairs of the projects in the workspace that match `name` and how they matched.
 
-        response = requests.get(url_project_wid, auth=authentication)
-        project_data = response.json()
+    A project whose whole name matches, ignoring case, is preferred over the projects whose
+    name starts with `name`, which are preferred over the names that are close to `name`.
+    """
+    key = name.lower()
 
-        if project_data is not None:
-            projects_dict = dict({wid: {}})
-            for project in project_data:
-                projects_dict[wid].update({str(project['id']): project['name']})
+    # Only the names the binary search compares are read from the catalog
+    prefixed = config['PROJECTS'].find_prefix(workspace_id, key)
+    exact = [project for project in prefixed if project[1].lower() == key]
 
-            config['PROJECTS'].update(projects_dict)
+    if len(exact) > 0:
+        return exact, 'exact'
+    if len(prefixed) > 0:
+        return prefixed, 'prefix'
 
-    with open(config_file_path, 'w') as f:
-        json.dump(config, f, indent=4)
+    # Only a name that matches nothing is compared with every project
+    from difflib import get_close_matches
+
+    projects = sorted(config['PROJECTS'].get(workspace_id, {}).items(), key=get_sort_key)
+    close_names = set(get_close_matches(key, [project_name.lower() for _, project_name in projects], n=5))
+    return [project for project in projects if project[1].lower() in close_names], 'close'
+
+
+def get_project_id_from_name(workspace_id: str, name: str) -> str:
+    projects, match = find_projects(workspace_id, name)
+    workspace_name = config['WORKSPACES'].get(workspace_id, workspace_id)
+
+    if len(projects) == 0:
+        sys.exit(f'ERROR: There is no project named "{name}" in the "{workspace_name}" workspace.\n'
+                 f"If you created it recently, please run 'tgl reconfig -w \"{workspace_name}\"' "
+                 f"to reconfigure the projects of the workspace.")
+
+    names = ', '.join(f'"{project_name}"' for _, project_name in projects[:5])
+
+    if len(projects) > 1:
+        if match == 'close':
+            sys.exit(f'ERROR: There is no project named "{name}". Did you mean one of {names}?')
+
+        sys.exit(f'ERROR: "{name}" matches more than one project: {names}'
+                 + (', ...' if len(projects) > 5 else '') + '.')
+
+    if match != 'exact':
+        print(f'Using project {names}.')
+
+    return projects[0][0]
 
 
 def add_previous_timer_to_config(timer_data: dict) -> None:
@@ -83,15 +230,13 @@ def add_previous_timer_to_config(timer_data: dict) -> None:
     except KeyError:
         config['PREVIOUS_TIMER']['tags'] = ""
 
-    with open(config_file_path, 'w') as f:
-        json.dump(config, f, indent=4)
+    config.save('PREVIOUS_TIMER')
 
 
 def remove_previous_timer_from_config():
     config['PREVIOUS_TIMER'].clear()
 
-    with open(config_file_path, 'w') as f:
-        json.dump(config, f, indent=4)
+    config.save('PREVIOUS_TIMER')
 
 
 def are_defaults_empty() -> bool:
@@ -104,9 +249,10 @@ def delete_user_data() -> None:
     config['DEFAULTS'].clear()
     config['PROJECTS'].clear()
     config['WORKSPACES'].clear()
+    config['SYNC'].clear()
+    config['CURRENT_TIMER'] = {}
 
-    with open(config_file_path, 'w') as f:
-        json.dump(config, f, indent=4)
+    config.save('DEFAULTS', 'PROJECTS', 'WORKSPACES', 'SYNC', 'CURRENT_TIMER')
 
 
 def auth_from_config() -> Tuple[str, str]:
@@ -121,44 +267,82 @@ def are_there_projects() -> bool:
 
 
 def project_selection(workspace_id: str) -> str:
-    print("\n0: Don't use any project")
-    print("--------------------------")
-    for i, project in enumerate(config['PROJECTS'][workspace_id].items()):
-        print(str(i + 1) + f": {project[1]}")
+    from tgl.picker import pick
 
-    selection = input("\nPlease enter the number of the project you want to use: ")
-    try:
-        selection = int(selection) - 1
-    except ValueError:
-        sys.exit("\nERROR: Selection entered was not a number.")
-
-    # Check if user entered 0 (Don't use any project)
-    # If so, then project_id is ""
-    # Else, try to get the project id from config
-    if selection == -1:
-        project_id = ""
-    else:
-        try:
-            project_id = list(config['PROJECTS'][workspace_id].keys())[selection]
-        except IndexError:
-            sys.exit("\nERROR: Selection not valid. Timer not started.")
+    # Offered in name order, the order of the projects in the catalog
+    choices = sorted(config['PROJECTS'].get(workspace_id, {}).items(), key=get_sort_key)
+
+    # '' when the user entered 0 (Don't use any project)
+    return pick(
+        choices,
+        "Please enter the number of the project you want to use: ",
+        none_choice="Don't use any project",
+        invalid_message="\nERROR: Selection not valid. Timer not started."
+    )
+
+
+def cache_current_timer(timer_data: Optional[dict]) -> None:
+    # `None` is also cached since knowing that no timer is running saves a request too
+    config['CURRENT_TIMER'] = {'data': timer_data, 'updated_at': time.time()}
+    config.save('CURRENT_TIMER')
+
+
+def get_cached_current_timer() -> Optional[dict]:
+    """ Return the cached current timer entry ({'data': ...}) or None if it is missing or stale. """
+    cache = config.get('CURRENT_TIMER', {})
+    ttl = config.get('SETTINGS', {}).get('CURRENT_TIMER_TTL', DEFAULT_CURRENT_TIMER_TTL)
+
+    if len(cache) == 0 or time.time() - cache['updated_at'] > ttl:
+        return None
+
+    return cache
+
+
+def get_started_timer() -> Optional[dict]:
+    """ Return the last timer that tgl knows was running, without checking how old the cache is. """
+    return config.get('CURRENT_TIMER', {}).get('data')
 
-    return project_id
 
+def get_current_timer(authentication: Tuple[str, str], refresh: bool = False) -> Optional[dict]:
+    if not refresh:
+        cache = get_cached_current_timer()
+        if cache is not None:
+            return cache['data']
 
-def is_timer_running(authentication: Tuple[str, str]) -> bool:
     url = config['URI']['CURRENT']
 
-    response = requests.get(url, auth=authentication)
-    response_json = response.json()
+    response = get_client().get(url, auth=authentication)
 
-    if response_json['data'] is None:
+    if response.status_code != 200:
+        sys.exit(f"ERROR: Current timer could not be checked. Response: {response.status_code}")
+
+    timer_data = response.json()['data']
+
+    cache_current_timer(timer_data)
+
+    return timer_data
+
+
+def parse_time(timestamp: str) -> 'datetime':
+    from datetime import datetime
+
+    # Since Python 3.6 is supported, the ':' in the timezone has to be removed from the time
+    # This changed in Python 3.7 where %z can accept the ':' in the timezone
+    if timestamp[-3] == ':':
+        timestamp = timestamp[:-3] + timestamp[-2:]
+
+    return datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S%z')
+
+
+def is_timer_running(authentication: Tuple[str, str], refresh: bool = False) -> bool:
+    if get_current_timer(authentication, refresh=refresh) is None:
         return False
 
     return True
 
 
-def workspace_selection(verbose: bool = True) -> str:
+def workspace_selection(verbose: bool = True, file: Optional[TextIO] = None) -> str:
+    """ Ask the user for a workspace, showing the choices on `file` or the standard output. """
     if len(config['WORKSPACES']) == 1:
         workspace_id = list(config['WORKSPACES'].keys())[0]
         if verbose:
@@ -168,22 +352,14 @@ def workspace_selection(verbose: bool = True) -> str:
 
         return workspace_id
 
-    print()
-    for i, workspace in enumerate(config['WORKSPACES'].items()):
-        print(str(i + 1) + f": {workspace[1]}")
+    from tgl.picker import pick
 
-    selection = input("\nPlease enter the number of the workspace you want to use: ")
-    try:
-        selection = int(selection) - 1
-    except ValueError:
-        sys.exit("\nERROR: Selection entered was not a number.")
-
-    try:
-        workspace_id = list(config['WORKSPACES'].keys())[selection]
-    except IndexError:
-        sys.exit("\nERROR: Selection not valid. Timer not started.")
-
-    return workspace_id
+    return pick(
+        list(config['WORKSPACES'].items()),
+        "Please enter the number of the workspace you want to use: ",
+        invalid_message="\nERROR: Selection not valid. Timer not started.",
+        file=file
+    )
 
 
 def get_default_workspace():
@@ -191,23 +367,22 @@ def get_default_workspace():
 
 
 def get_project_id_from_user_selection() -> str:
-    all_project_dict = config['PROJECTS']
-    selection_dict: Dict[str, str] = {}
-
-    for i, project_dic in enumerate(all_project_dict.items(), start=1):
-        wid: str = project_dic[0]
-        workspace_name = config['WORKSPACES'][wid]
-
-        workspace_output = f"Workspace: {workspace_name}"
-        workspace_output = workspace_output + "\n" + ("-" * len(workspace_output))
-        print(workspace_output)
-
-        for pid, project_name in project_dic[1].items():
-            selection_dict[str(i)] = pid
-            print("    " + str(i) + ": " + project_name)
-
-        print()
-
-    user_selection = input("\nPlease enter the number of the project you want to delete: ")
-
-    return selection_dict[user_selection]
+    from tgl.picker import pick
+
+    # Projects from every workspace are numbered in one list, with the workspace next to
+    # the name when there is more than one
+    choices = []
+    for wid, projects in config['PROJECTS'].items():
+        workspace_name = config['WORKSPACES'].get(wid, wid)
+
+        for pid, name in sorted(projects.items(), key=get_sort_key):
+            if len(config['PROJECTS']) > 1:
+                choices.append((pid, f"{name} ({workspace_name})"))
+            else:
+                choices.append((pid, name))
+
+    return pick(
+        choices,
+        "Please enter the number of the project you want to delete: ",
+        invalid_message="\nERROR: Selection not valid. No project deleted."
+    )